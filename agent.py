@@ -1,6 +1,7 @@
-import os
+from typing import AsyncIterator
 from mistralai import Mistral
 import discord
+from settings import settings
 
 MISTRAL_MODEL = "mistral-large-latest"
 SYSTEM_PROMPT = "You are a helpful assistant."
@@ -8,18 +9,19 @@ SYSTEM_PROMPT = "You are a helpful assistant."
 
 class MistralAgent:
     def __init__(self):
-        MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
+        self.client = Mistral(api_key=settings().mistral_api_key)
 
-        self.client = Mistral(api_key=MISTRAL_API_KEY)
+    def _build_messages(self, message: discord.Message):
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": message.content},
+        ]
 
     async def run(self, message: discord.Message):
         # The simplest form of an agent
         # Send the message's content to Mistral's API and return Mistral's response
 
-        messages = [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": message.content},
-        ]
+        messages = self._build_messages(message)
 
         response = await self.client.chat.complete_async(
             model=MISTRAL_MODEL,
@@ -27,3 +29,18 @@ class MistralAgent:
         )
 
         return response.choices[0].message.content
+
+    async def run_stream(self, message: discord.Message) -> AsyncIterator[str]:
+        # Same request as run, but yield the response text as Mistral generates it
+
+        messages = self._build_messages(message)
+
+        response = await self.client.chat.stream_async(
+            model=MISTRAL_MODEL,
+            messages=messages,
+        )
+
+        async for chunk in response:
+            content = chunk.data.choices[0].delta.content
+            if isinstance(content, str) and content:
+                yield content
@@ -0,0 +1,26 @@
+import asyncio
+
+async def collect_batch(batch_queue: asyncio.Queue, size: int, interval: float) -> list:
+    """
+    Wait for a queued item, then collect more until the batch is full or the interval elapses
+
+    Args:
+        batch_queue: The queue to drain
+        size: Maximum number of items in the batch
+        interval: Seconds to wait for the batch to fill up after the first item
+
+    Returns:
+        The collected items, in queue order
+    """
+    loop = asyncio.get_running_loop()
+    batch = [await batch_queue.get()]
+    deadline = loop.time() + interval
+    while len(batch) < size:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(batch_queue.get(), timeout=remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
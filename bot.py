@@ -1,59 +1,500 @@
-import os
+import atexit
 import discord
 import logging
+import logging.handlers
+import queue
 from discord.ext import commands, tasks
-from dotenv import load_dotenv
+from settings import settings
 from agent import MistralAgent
-from sqlalchemy.orm import sessionmaker
-from models import engine, ChatLog, FutureMessage
+from batching import collect_batch
+from models import Session, AsyncSession, ChatLog, MessageSentiment, FutureMessage
 from sentiment_analyzer import SentimentAnalyzer
-from journal_analyzer import JournalAnalyzer
+from journal_analyzer import JournalAnalyzer, TimelineEntries
 from dashboard import Dashboard
-from datetime import datetime, timedelta, UTC
+from datetime import datetime, time, timedelta, UTC
+from sqlalchemy import and_, delete, func, insert, select
+from sqlalchemy.orm import selectinload
 from gamification import GamificationManager
 from memory_capsule_manager import MemoryCapsuleManager
+from response_cache import SemanticResponseCache
 import asyncio
+import bisect
+import functools
+import io
+import json
+import math
+import re
+import textwrap
+import threading
+import unicodedata
+import numpy as np
+
+try:
+    import uvloop
+except ImportError:  # uvloop isn't available on Windows; the default asyncio loop is used instead
+    uvloop = None
 
 PREFIX = "!"
 
 # Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Records are handed to a queue and written by a listener thread, so the event loop never blocks on log I/O
+log_output = logging.StreamHandler()
+log_output.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(log_queue, log_output)
+log_listener.start()
+atexit.register(log_listener.stop)  # Flush queued records on shutdown
+logging.basicConfig(level=logging.INFO, handlers=[logging.handlers.QueueHandler(log_queue)])
 logger = logging.getLogger("discord")
 
-# Load the environment variables
-load_dotenv()
-
-# Create the bot with all intents
-# The message content and members intent must be enabled in the Discord Developer Portal for the bot to work.
-intents = discord.Intents.all()
+# Create the bot with only the intents it uses (default guild/DM messages and reactions, plus message content)
+# The message content intent must be enabled in the Discord Developer Portal for the bot to work.
+# Enable further flags (e.g. intents.members) individually if a command starts needing them.
+intents = discord.Intents.default()
+intents.message_content = True
 bot = commands.Bot(command_prefix=PREFIX, intents=intents)
 
-# Initialize database session maker
-Session = sessionmaker(bind=engine)
-
 # Initialize components
-agent = MistralAgent()
-sentiment_analyzer = SentimentAnalyzer()
-journal_analyzer = JournalAnalyzer()
-dashboard = Dashboard(Session)
+# Components are built on first use so startup doesn't wait on model loads or API clients
+def _component(factory):
+    """
+    Cache a component factory's result, building it at most once
 
-# Initialize gamification manager with a session instance
-db_session = Session()
-gamification_manager = GamificationManager(db_session)
+    functools.cache takes no lock, so a command racing the startup load would build a second copy
+    of a model; the double-checked lock makes every other caller wait for the first build instead
+    """
+    lock = threading.Lock()
+    instance = None
+
+    @functools.wraps(factory)
+    def get():
+        nonlocal instance
+        if instance is None:
+            with lock:
+                if instance is None:
+                    instance = factory()
+        return instance
+
+    get.is_loaded = lambda: instance is not None
+    return get
+
+@_component
+def _agent() -> MistralAgent:
+    return MistralAgent()
+
+@_component
+def _response_cache() -> SemanticResponseCache:
+    return SemanticResponseCache()
+
+@_component
+def _sentiment_analyzer() -> SentimentAnalyzer:
+    return SentimentAnalyzer()
+
+@_component
+def _journal_analyzer() -> JournalAnalyzer:
+    # Share the sentiment model rather than loading a second copy
+    return JournalAnalyzer(sentiment_analyzer=_sentiment_analyzer())
+
+@_component
+def _dashboard() -> Dashboard:
+    return Dashboard(Session)
+
+@_component
+def _gamification_manager() -> GamificationManager:
+    # Seeds the default achievements on first use
+    return GamificationManager(Session)
+
+@_component
+def _memory_capsule_manager() -> MemoryCapsuleManager:
+    return MemoryCapsuleManager(Session)
+
+# In dependency order
+COMPONENTS = (_agent, _response_cache, _sentiment_analyzer, _journal_analyzer,
+              _dashboard, _gamification_manager, _memory_capsule_manager)
+
+# Set once on_ready has finished the startup load
+components_ready = asyncio.Event()
+
+def _load_components():
+    """
+    Build every component that isn't built yet, in dependency order
 
-# Initialize memory capsule manager with a session instance
-memory_capsule_manager = MemoryCapsuleManager(db_session)
+    Runs in a worker thread so the model loads and quantization don't block the event loop;
+    a component that fails here is logged and retried by the next _ensure_components
+    """
+    for factory in COMPONENTS:
+        if factory.is_loaded():
+            continue
+        try:
+            factory()
+        except Exception as e:
+            logger.error("Error loading %s: %s", factory.__name__, e)
+
+async def _ensure_components():
+    """Wait for the startup load, then retry any component that failed there off the event loop"""
+    await components_ready.wait()
+    if not all(factory.is_loaded() for factory in COMPONENTS):
+        await asyncio.to_thread(_load_components)
 
 # Get the token from the environment variables
-token = os.getenv("DISCORD_TOKEN")
+token = settings().discord_token
+
+# Discord user IDs allowed to run admin commands (set AUTHORIZED_USER_IDS, comma-separated)
+AUTHORIZED_USER_IDS = settings().authorized_user_ids
+
+class NotAuthorized(commands.CheckFailure):
+    """Raised when a non-admin invokes an admin-only command"""
+
+def _is_admin(ctx) -> bool:
+    """Whether the command author may use admin commands"""
+    return ctx.author.id in AUTHORIZED_USER_IDS
+
+def _require_admin(ctx) -> bool:
+    """Command check that rejects non-admins before the command body runs"""
+    if not _is_admin(ctx):
+        raise NotAuthorized()
+    return True
+
+admin_only = commands.check(_require_admin)
+
+# Sentiment analysis runs in the background, batching queued (chat_log_id, text, user_id) items
+SENTIMENT_BATCH_SIZE = 16
+SENTIMENT_FLUSH_INTERVAL = 0.1  # Seconds to wait for a batch to fill up
+sentiment_queue = asyncio.Queue()
+sentiment_worker_task = None
+
+# Chat logs are written in batches as well: one multi-row INSERT per batch instead of one per message
+CHAT_LOG_BATCH_SIZE = settings().db_batch
+CHAT_LOG_FLUSH_INTERVAL = 0.05  # Seconds to wait for a batch to fill up
+chat_log_queue = asyncio.Queue()
+chat_log_worker_task = None
+
+# Chat messages are handled by a fixed pool of workers; each user maps to one worker's
+# queue so a user's messages keep their order while different users (even in the same
+# busy channel) are answered in parallel
+MESSAGE_WORKERS = 8
+MESSAGE_QUEUE_SIZE = 512  # Total backlog across all workers
+message_queues = [asyncio.Queue(maxsize=MESSAGE_QUEUE_SIZE // MESSAGE_WORKERS) for _ in range(MESSAGE_WORKERS)]
+message_worker_tasks = []
+
+# Cap on concurrent LLM-backed calls across chat replies and commands, so bursts queue here
+# instead of tripping the provider's rate limits
+LLM_MAX_INFLIGHT = settings().llm_max_inflight
+llm_slots = asyncio.Semaphore(LLM_MAX_INFLIGHT)
+LLM_QUEUED_NOTICE = "⏳ Queued behind other requests, I'll get to yours shortly..."
+
+# Seconds between edits of a streamed reply (Discord allows about 5 edits per 5 seconds)
+STREAM_EDIT_INTERVAL = 1.0
+
+# Discord messages are capped at 2000 characters; long texts are sent in chunks of this size
+MESSAGE_CHUNK_SIZE = 1900
+EMBED_FIELD_LIMIT = 1024  # Maximum length of an embed field value
+ATTACHMENT_THRESHOLD = 10_000  # Longer single texts are uploaded as one file instead of many chunks
+
+def _joins_previous(char: str) -> bool:
+    """Whether char renders as part of the preceding character (accents, emoji modifiers, keycaps)"""
+    return (
+        unicodedata.combining(char) != 0
+        or char in "\u200d\u20e3"  # Zero-width joiner, combining keycap
+        or "\ufe00" <= char <= "\ufe0f"  # Variation selectors (e.g. emoji presentation)
+        or "\U0001f3fb" <= char <= "\U0001f3ff"  # Skin tone modifiers
+    )
+
+def _chunk(text: str, size: int = MESSAGE_CHUNK_SIZE):
+    """Lazily yield consecutive slices of text no longer than size, without splitting a visible character"""
+    start, end = 0, len(text)
+    while start < end:
+        cut = min(start + size, end)
+        # Back up while the cut would separate a character from its modifiers or a ZWJ sequence
+        while start + 1 < cut < end and (_joins_previous(text[cut]) or text[cut - 1] == "\u200d"):
+            cut -= 1
+        yield text[start:cut]
+        start = cut
+
+def _pack(text: str, limit: int = MESSAGE_CHUNK_SIZE, separators: tuple = ("\n\n", "\n", " ")):
+    """
+    Greedily pack text into as few chunks as possible, breaking on the coarsest boundary that fits
+    
+    Args:
+        text: Text to split
+        limit: Maximum chunk length
+        separators: Boundaries to split on, from paragraphs down to words
+        
+    Returns:
+        Generator of non-empty chunks no longer than limit
+    """
+    if len(text) <= limit:
+        if text.strip():
+            yield text
+        return
+    if not separators:
+        # No natural boundary left (e.g. one enormous word); fall back to fixed-size slices
+        yield from _chunk(text, limit)
+        return
+
+    # Segments are buffered with a running length and joined once per chunk, so each
+    # character is copied once instead of on every append
+    separator, finer_separators = separators[0], separators[1:]
+    buffer, size = [], 0
+    for segment in text.split(separator):
+        if not size:
+            buffer = []  # Drop empty leading segments, which would only add a separator
+        added = len(separator) + len(segment) if buffer else len(segment)
+        if size + added <= limit:
+            buffer.append(segment)
+            size += added
+            continue
+        current = separator.join(buffer)
+        if current.strip():
+            yield current
+        if len(segment) <= limit:
+            buffer, size = [segment], len(segment)
+        else:
+            yield from _pack(segment, limit, finer_separators)
+            buffer, size = [], 0
+    current = separator.join(buffer)
+    if current.strip():
+        yield current
+
+# Client-side send budget per channel, matching Discord's 5 messages per 5 seconds
+CHANNEL_SEND_RATE = 5
+CHANNEL_SEND_PER = 5.0  # seconds
+
+class _ChannelSender:
+    """Token bucket in front of one channel's send() so bursts are smoothed instead of hitting 429s"""
+
+    def __init__(self, channel, rate: int = CHANNEL_SEND_RATE, per: float = CHANNEL_SEND_PER):
+        """
+        Args:
+            channel: The Discord channel (or DM channel) to send to
+            rate: Number of messages allowed per period
+            per: Length of the period in seconds
+        """
+        self.channel = channel
+        self.capacity = rate
+        self.refill_rate = rate / per
+        self.tokens = float(rate)
+        self.updated = None
+        # asyncio.Lock wakes waiters in FIFO order, so messages keep the order they were sent in
+        self.lock = asyncio.Lock()
+        self.pending = 0  # Sends waiting for or holding the lock
+
+    async def send(self, *args, **kwargs) -> discord.Message:
+        """Wait for a token, then send; arguments are passed to channel.send()"""
+        self.pending += 1
+        try:
+            async with self.lock:
+                loop = asyncio.get_running_loop()
+                now = loop.time()
+                if self.updated is not None:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+                self.updated = now
+
+                if self.tokens < 1:
+                    await asyncio.sleep((1 - self.tokens) / self.refill_rate)
+                    self.tokens = 1.0
+                    self.updated = loop.time()
+
+                self.tokens -= 1
+                return await self.channel.send(*args, **kwargs)
+        finally:
+            self.pending -= 1
+
+    def is_idle(self) -> bool:
+        """Whether nothing is sending and the bucket has refilled, i.e. a fresh sender would behave the same"""
+        if self.pending:
+            return False
+        if self.updated is None:
+            return True
+        elapsed = asyncio.get_running_loop().time() - self.updated
+        return self.tokens + elapsed * self.refill_rate >= self.capacity
+
+# Senders are created per channel (including every reminder DM); idle ones are dropped beyond this many
+CHANNEL_SENDER_CACHE_SIZE = 256
+_channel_senders = {}
+
+def _sender_for(channel) -> _ChannelSender:
+    """Get the shared rate-limited sender for a channel"""
+    sender = _channel_senders.get(channel.id)
+    if sender is None:
+        if len(_channel_senders) >= CHANNEL_SENDER_CACHE_SIZE:
+            # Busy senders stay so their queued messages keep their order and budget
+            for channel_id in [channel_id for channel_id, other in _channel_senders.items() if other.is_idle()]:
+                del _channel_senders[channel_id]
+        sender = _channel_senders[channel.id] = _ChannelSender(channel)
+    return sender
+
+class _MessageBuffer:
+    """Pack consecutive text segments into as few Discord messages as possible"""
+
+    def __init__(self, destination, limit: int = MESSAGE_CHUNK_SIZE):
+        """
+        Args:
+            destination: A command context or channel; sends go through its channel's rate-limited sender
+            limit: Maximum length of a single packed message
+        """
+        self.destination = _sender_for(getattr(destination, "channel", destination))
+        self.limit = limit
+        self.parts = []
+        self.length = 0
+
+    async def add(self, text: str):
+        """Queue text, sending the buffered message first if it would overflow"""
+        if len(text) > ATTACHMENT_THRESHOLD:
+            # One upload instead of a burst of rate-limited chunk messages
+            await self.flush(file=discord.File(io.BytesIO(text.encode()), filename="response.txt"))
+            return
+        if self.length + len(text) > self.limit:
+            await self.flush()
+        if len(text) > self.limit:
+            # Oversized segments go out split on paragraph/line/word boundaries; the last piece stays buffered
+            *full_chunks, text = list(_pack(text, self.limit)) or [""]
+            for chunk in full_chunks:
+                await self.destination.send(chunk)
+        self.parts.append(text)
+        self.length += len(text)
+
+    async def flush(self, **kwargs):
+        """Send whatever is buffered; kwargs (e.g. file=) are passed to send()"""
+        # Discord rejects empty messages, and a trailing separator can overflow into a buffer of its own
+        text = "".join(self.parts)
+        if text.strip() or kwargs:
+            await self.destination.send(text if text.strip() else None, **kwargs)
+        self.parts = []
+        self.length = 0
+
+# Reused message text
+SEPARATOR = "─" * 40
+NUMBER_EMOJIS = ("1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣")
+NUMBER_EMOJI_INDEX = {emoji: i for i, emoji in enumerate(NUMBER_EMOJIS)}
+SENTIMENT_EMOJIS = ("📉", "📊", "📈")  # Negative, neutral, positive
+TIMELINE_FOOTER = (
+    "\n💡 **Timeline Tips**:\n"
+    "• Entries are grouped by month for easy navigation\n"
+    "• Each entry shows the date, dominant emotion, and sentiment score\n"
+    "• Use `!journal` to add new entries\n"
+    "• Use `!reflect` for a focused analysis of recent entries"
+)
+GROWTH_FORECAST_TIPS = (
+    "\n💡 **Tips for Using Your Growth Forecast:**\n"
+    "• Review these predictions periodically to track your progress\n"
+    "• Use `!journal` to document your journey toward these milestones\n"
+    "• Try `!reflect` to see how you're progressing on your growth path\n"
+    "• Adjust your focus based on the identified opportunities\n\n"
+    "*Remember: This forecast is a guide based on your patterns, not a fixed destiny. "
+    "You have the power to shape your growth journey!*"
+)
+LIFE_STORY_TIPS = (  # Shown in an embed footer, which doesn't render markdown
+    "💡 Story Navigation Tips:\n"
+    "• React to the number emojis above to read each chapter\n"
+    "• Each chapter focuses on a distinct phase of your journey\n"
+    "• The timeline shows key moments that shaped your story\n"
+    "• Use !reflect to dive deeper into specific periods"
+)
+DASHBOARD_EXPLANATION = (
+    "**📊 Understanding Your Dashboard**\n\n"
+    "The dashboard shows two interconnected charts:\n\n"
+    "**1. Overall Sentiment Trend (Top Chart)**\n"
+    "• Blue line shows your overall emotional state over time\n"
+    "• Range from -1 (very negative) to +1 (very positive)\n"
+    "• Each point represents a journal entry\n"
+    "• Hover over points to see exact dates and scores\n\n"
+    "**2. Emotional Components (Bottom Chart)**\n"
+    "• Shows the intensity of 8 core emotions:\n"
+    "  - Joy (Yellow) 🌟\n"
+    "  - Trust (Green) 🤝\n"
+    "  - Fear (Red) 😨\n"
+    "  - Surprise (Purple) 😮\n"
+    "  - Sadness (Blue) 😢\n"
+    "  - Disgust (Orange) 😖\n"
+    "  - Anger (Dark Red) 😠\n"
+    "  - Anticipation (Teal) 🎯\n\n"
+    "• Each emotion is tracked on a scale of 0 to 1\n"
+    "• Lines show how each emotion fluctuates over time\n"
+)
+
+async def _with_llm_slot(destination, call):
+    """
+    Run an LLM-backed call once a slot is free, posting a notice while the caller waits
+
+    Args:
+        destination: A command context, message or channel to post the waiting notice in
+        call: Zero-argument callable returning the coroutine to run (e.g. lambda: _stream_reply(message));
+            the coroutine is only created once the slot is held, so nothing is left unawaited if the
+            notice fails to send
+
+    Returns:
+        The coroutine's result
+    """
+    notice = None
+    if llm_slots.locked():
+        try:
+            notice = await _sender_for(getattr(destination, "channel", destination)).send(LLM_QUEUED_NOTICE)
+        except discord.HTTPException as e:
+            logger.error("Error sending queue notice: %s", e)
+    async with llm_slots:
+        if notice is not None:
+            try:
+                await notice.delete()
+            except discord.HTTPException as e:
+                logger.error("Error deleting queue notice: %s", e)
+        return await call()
+
+async def _chat_log_worker():
+    """Drain the chat log queue in batches, then queue each new log for sentiment analysis"""
+    while True:
+        batch = await collect_batch(chat_log_queue, CHAT_LOG_BATCH_SIZE, CHAT_LOG_FLUSH_INTERVAL)
+        try:
+            # One multi-row INSERT; ids come back in the same order as the rows
+            async with AsyncSession() as db_session, db_session.begin():
+                result = await db_session.execute(
+                    insert(ChatLog).returning(ChatLog.id, sort_by_parameter_order=True),
+                    batch
+                )
+                chat_log_ids = result.scalars().all()
 
-# List of authorized user IDs for admin commands (add your Discord user ID)
-AUTHORIZED_USERS = [
-    "1341570352840445983"  # Replace with your Discord user ID
-]
+            for row, chat_log_id in zip(batch, chat_log_ids):
+                sentiment_queue.put_nowait((chat_log_id, row["message_content"], row["user_id"]))
+        except Exception as e:
+            logger.error("Error storing chat log batch: %s", e)
+        finally:
+            for _ in batch:
+                chat_log_queue.task_done()
+
+async def _sentiment_worker():
+    """Drain the sentiment queue in batches and store their sentiment records"""
+    while True:
+        batch = await collect_batch(sentiment_queue, SENTIMENT_BATCH_SIZE, SENTIMENT_FLUSH_INTERVAL)
+        try:
+            await _ensure_components()
+            async with AsyncSession() as db_session, db_session.begin():
+                await _sentiment_analyzer().create_sentiment_records_batch(
+                    db_session, [(chat_log_id, text) for chat_log_id, text, _ in batch]
+                )
+            
+            # History and trend queries only see entries once their sentiment exists,
+            # so cached results go stale now rather than when the chat log was written
+            for user_id in {user_id for _, _, user_id in batch}:
+                _journal_analyzer().invalidate_user_cache(user_id)
+        except Exception as e:
+            logger.error("Error storing sentiment batch: %s", e)
+        finally:
+            for _ in batch:
+                sentiment_queue.task_done()
+
+def _log_task_exception(task: asyncio.Task):
+    """Log the exception of a background task that ended with one, since nothing awaits it"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background task %s failed: %s", task.get_name(), task.exception())
+
+async def _message_worker(message_queue: asyncio.Queue):
+    """Handle queued chat messages one at a time"""
+    while True:
+        message = await message_queue.get()
+        try:
+            await _handle_message(message)
+        finally:
+            message_queue.task_done()
 
 @bot.event
 async def on_ready():
@@ -63,9 +504,26 @@ async def on_ready():
 
     https://discordpy.readthedocs.io/en/latest/api.html#discord.on_ready
     """
-    logger.info(f"{bot.user} has connected to Discord!")
+    logger.info("%s has connected to Discord!", bot.user)
+    # Start the background workers (on_ready can fire again after reconnects)
+    global sentiment_worker_task, chat_log_worker_task
+    if sentiment_worker_task is None:
+        # Load the models and clients off the event loop before the workers start using them
+        await asyncio.to_thread(_load_components)
+        components_ready.set()
+        sentiment_worker_task = asyncio.create_task(_sentiment_worker(), name="sentiment-worker")
+        sentiment_worker_task.add_done_callback(_log_task_exception)
+    if chat_log_worker_task is None:
+        chat_log_worker_task = asyncio.create_task(_chat_log_worker(), name="chat-log-worker")
+        chat_log_worker_task.add_done_callback(_log_task_exception)
+    if not message_worker_tasks:
+        for i, message_queue in enumerate(message_queues):
+            task = asyncio.create_task(_message_worker(message_queue), name=f"message-worker-{i}")
+            task.add_done_callback(_log_task_exception)
+            message_worker_tasks.append(task)
     # Start the journaling reminder task
-    check_inactive_users.start()
+    if not check_inactive_users.is_running():
+        check_inactive_users.start()
 
 @bot.event
 async def on_message(message: discord.Message):
@@ -74,46 +532,93 @@ async def on_message(message: discord.Message):
 
     https://discordpy.readthedocs.io/en/latest/api.html#discord.on_message
     """
-    # Don't delete this line! It's necessary for the bot to process commands.
-    await bot.process_commands(message)
-
     # Ignore messages from self or other bots to prevent infinite loops.
-    if message.author.bot or message.content.startswith("!"):
+    if message.author.bot:
         return
 
-    # Create database session
-    db_session = Session()
+    # Commands go to the command handler only; everything else goes to the agent.
+    # Don't delete this! It's necessary for the bot to process commands.
+    if message.content.startswith(PREFIX):
+        await bot.process_commands(message)
+        return
+
+    # Attachment- or sticker-only messages have no text for the agent or the sentiment model
+    if not message.content.strip():
+        return
+
+    # Hand the message to its author's worker so a slow agent call doesn't hold up this event
     try:
-        # Process the message with the agent
-        logger.info(f"Processing message from {message.author}: {message.content}")
-        response = await agent.run(message)
-
-        # Create chat log entry
-        chat_log = ChatLog(
-            user_id=str(message.author.id),
-            username=message.author.name,
-            message_content=message.content,
-            bot_response=response
-        )
-        db_session.add(chat_log)
-        db_session.flush()  # This will populate the chat_log.id
+        message_queues[message.author.id % MESSAGE_WORKERS].put_nowait(message)
+    except asyncio.QueueFull:
+        logger.warning("Message queue full, dropping message from %s", message.author)
+        await message.reply("I'm handling a lot of messages right now. Please try again in a moment.")
 
-        # Perform sentiment analysis and create sentiment record
-        sentiment_analyzer.create_sentiment_record(db_session, chat_log.id, message.content)
-        
-        # Commit the transaction
-        db_session.commit()
+async def _stream_reply(message: discord.Message) -> str:
+    """
+    Stream the agent's reply into a single Discord message, editing it as text arrives
+
+    Args:
+        message: The user's Discord message
 
-        # Send the response back to the channel
-        await message.reply(response)
+    Returns:
+        The full response text
+    """
+    loop = asyncio.get_running_loop()
+    reply = await message.reply("…")
+    parts = []
+    last_edit = loop.time()
+
+    async for token in _agent().run_stream(message):
+        parts.append(token)
+        if loop.time() - last_edit >= STREAM_EDIT_INTERVAL:
+            await reply.edit(content="".join(parts)[:MESSAGE_CHUNK_SIZE])
+            last_edit = loop.time()
+
+    # Final edit with the complete text; anything past the message limit follows as new messages
+    response = "".join(parts)
+    first_chunk, *other_chunks = list(_pack(response)) or ["…"]
+    await reply.edit(content=first_chunk)
+    for chunk in other_chunks:
+        await message.channel.send(chunk)
+    return response
+
+async def _handle_message(message: discord.Message):
+    """
+    Generate, log and send the agent's reply to a chat message
+
+    Args:
+        message: The user's Discord message
+    """
+    try:
+        # Process the message with the agent
+        logger.info("Processing message from %s: %s", message.author, message.content)
+        # The embedding model runs in a worker thread so the event loop keeps serving the gateway
+        await _ensure_components()
+        cached_response = await asyncio.to_thread(lambda: _response_cache().lookup(message.author.id, message.content))
+        if cached_response is None:
+            response = await _with_llm_slot(message, lambda: _stream_reply(message))
+            await asyncio.to_thread(lambda: _response_cache().store(message.author.id, message.content, response))
+        else:
+            response = cached_response
+            # Streamed responses are already in the channel; send cached ones before persisting,
+            # split the same way so long replies don't exceed the message limit
+            first_chunk, *other_chunks = list(_pack(response)) or ["…"]
+            await message.reply(first_chunk)
+            for chunk in other_chunks:
+                await message.channel.send(chunk)
+
+        # Queue the chat log for the batched writer, which then queues its sentiment analysis
+        chat_log_queue.put_nowait({
+            "user_id": str(message.author.id),
+            "username": message.author.name,
+            "message_content": message.content,
+            "bot_response": response,
+            "timestamp": datetime.now(UTC)
+        })
 
     except Exception as e:
-        logger.error(f"Error processing message: {str(e)}")
-        db_session.rollback()
+        logger.error("Error processing message: %s", e)
         await message.reply("I encountered an error while processing your message. Please try again later.")
-    
-    finally:
-        db_session.close()
 
 
 # Commands
@@ -133,266 +638,282 @@ async def ping(ctx, *, arg=None):
 @bot.command(name="sentiment", help="Get sentiment analysis for recent messages")
 async def get_sentiment(ctx):
     """Command to get sentiment analysis statistics for recent messages"""
-    db_session = Session()
     try:
-        # Get the 10 most recent chat logs with their sentiment analysis
-        recent_logs = db_session.query(ChatLog).order_by(ChatLog.timestamp.desc()).limit(10).all()
+        async with AsyncSession() as db_session:
+            # Get the 10 most recent analyzed chat logs, selecting only the columns we display
+            result = await db_session.execute(
+                select(
+                    ChatLog.message_content,
+                    MessageSentiment.compound_score,
+                    MessageSentiment.confidence,
+                    MessageSentiment.dominant_emotion,
+                    MessageSentiment.dominant_score
+                )
+                .join(MessageSentiment, MessageSentiment.chat_log_id == ChatLog.id)
+                .order_by(ChatLog.timestamp.desc())
+                .limit(10)
+            )
+            rows = result.all()
         
-        if not recent_logs:
+        if not rows:
             await ctx.send("No recent messages found to analyze.")
             return
 
-        # Calculate average sentiment scores
-        sentiment_summary = "Recent Chat Sentiment Analysis:\n\n"
-        
-        for log in recent_logs:
-            if log.sentiment:
-                sentiment = log.sentiment
-                dominant_emotion = max([
-                    ('Joy', sentiment.joy),
-                    ('Trust', sentiment.trust),
-                    ('Fear', sentiment.fear),
-                    ('Surprise', sentiment.surprise),
-                    ('Sadness', sentiment.sadness),
-                    ('Disgust', sentiment.disgust),
-                    ('Anger', sentiment.anger),
-                    ('Anticipation', sentiment.anticipation)
-                ], key=lambda x: x[1])
-
-                sentiment_summary += f"Message: '{log.message_content[:50]}...'\n"
-                sentiment_summary += f"Dominant Emotion: {dominant_emotion[0]} ({dominant_emotion[1]:.2f})\n"
-                sentiment_summary += f"Overall Sentiment: {sentiment.compound_score:.2f}\n"
-                sentiment_summary += f"Confidence: {sentiment.confidence:.2f}\n\n"
-
-        await ctx.send(sentiment_summary)
+        summary_parts = ["Recent Chat Sentiment Analysis:\n\n"]
+        for row in rows:
+            summary_parts.append(
+                f"Message: '{row.message_content[:50]}...'\n"
+                f"Dominant Emotion: {row.dominant_emotion.title()} ({row.dominant_score:.2f})\n"
+                f"Overall Sentiment: {row.compound_score:.2f}\n"
+                f"Confidence: {row.confidence:.2f}\n\n"
+            )
+
+        await ctx.send("".join(summary_parts))
 
     except Exception as e:
-        logger.error(f"Error getting sentiment analysis: {str(e)}")
+        logger.error("Error getting sentiment analysis: %s", e)
         await ctx.send("Error retrieving sentiment analysis.")
-    
-    finally:
-        db_session.close()
 
 
 @bot.command(name="journal", help="Log a journal entry and get sentiment analysis")
 async def journal_entry(ctx, *, entry_text: str):
     """Log a journal entry and provide sentiment analysis"""
+    user_id = str(ctx.author.id)
     try:
         # Log the entry
-        chat_log, sentiment = journal_analyzer.log_entry(str(ctx.author.id), entry_text)
+        chat_log, sentiment = await _journal_analyzer().log_entry(user_id, entry_text)
         
         # Perform comprehensive analysis
-        analysis = await journal_analyzer.analyze_sentiment(entry_text)
+        analysis = await _with_llm_slot(ctx, lambda: _journal_analyzer().analyze_sentiment(entry_text))
         
         # Create a detailed response
-        response = "📝 **Journal Entry Analysis**\n\n"
+        response_parts = ["📝 **Journal Entry Analysis**\n\n"]
         
         # Sentiment summary
-        response += "**Emotional Analysis:**\n"
-        dominant_emotion = max(analysis['sentiment']['emotions'].items(), key=lambda x: x[1])
-        response += f"• Primary Emotion: {dominant_emotion[0].title()} ({dominant_emotion[1]:.2f})\n"
-        response += f"• Overall Sentiment: {analysis['sentiment']['compound_score']:.2f}\n"
-        response += f"• Emotional Intensity: {analysis['sentiment']['intensity']:.2f}\n\n"
+        emotions = analysis['sentiment']['emotions']
+        dominant_emotion = max(emotions, key=emotions.get)
+        response_parts.append(
+            "**Emotional Analysis:**\n"
+            f"• Primary Emotion: {dominant_emotion.title()} ({emotions[dominant_emotion]:.2f})\n"
+            f"• Overall Sentiment: {analysis['sentiment']['compound_score']:.2f}\n"
+            f"• Emotional Intensity: {analysis['sentiment']['intensity']:.2f}\n\n"
+        )
         
         # Theme analysis
-        response += "**Themes and Patterns:**\n"
-        response += "• Main Themes: " + ", ".join(analysis['themes']['themes'][:3]) + "\n"
-        response += "• Emotional Patterns: " + ", ".join(analysis['themes']['emotional_patterns'][:2]) + "\n"
-        response += "• Growth Indicators: " + ", ".join(analysis['themes']['growth_indicators'][:2]) + "\n"
+        response_parts.append(
+            "**Themes and Patterns:**\n"
+            f"• Main Themes: {', '.join(analysis['themes']['themes'][:3])}\n"
+            f"• Emotional Patterns: {', '.join(analysis['themes']['emotional_patterns'][:2])}\n"
+            f"• Growth Indicators: {', '.join(analysis['themes']['growth_indicators'][:2])}\n"
+        )
         
         # Send the analysis
-        await ctx.send(response)
+        await ctx.send("".join(response_parts))
         
         # Update user's profile and check for achievements
-        await gamification_manager.update_profile_stats(str(ctx.author.id), ctx.author.name)
+        await _gamification_manager().update_profile_stats(user_id, ctx.author.name)
         
     except Exception as e:
-        logger.error(f"Error processing journal entry: {str(e)}")
+        logger.error("Error processing journal entry: %s", e)
         await ctx.send("Sorry, there was an error processing your journal entry. Please try again later.")
 
 @bot.command(name="clear", help="Clear your journal entries and future messages. Use '!clear journal' to clear all journal entries, '!clear journal <entry_number>' to delete a specific entry, '!clear futureMessages' to clear all future messages, or '!clear futureMessage <message_number>' to delete a specific future message.")
 async def clear(ctx, clear_type: str = None, entry_number: int = None):
     """Clear journal entries or future messages"""
+    user_id = str(ctx.author.id)
     try:
-        db_session = Session()
-        
-        if not clear_type:
-            # Clear everything
-            try:
-                # Delete all chat logs (journal entries) for this user
-                db_session.query(ChatLog).filter(ChatLog.user_id == str(ctx.author.id)).delete()
-                # Delete all future messages for this user
-                db_session.query(FutureMessage).filter(FutureMessage.user_id == str(ctx.author.id)).delete()
-                db_session.commit()
-                await ctx.send("✨ Successfully cleared all your journal entries and future messages!")
-                return
-            except Exception as e:
-                logger.error(f"Error clearing all data: {str(e)}")
-                db_session.rollback()
-                await ctx.send("❌ An error occurred while clearing your data.")
-                return
+        # Deletes can touch many rows, so they run on the async engine instead of blocking the event loop
+        async with AsyncSession() as db_session:
+            if not clear_type:
+                # Clear everything
+                try:
+                    # Bulk deletes skip the identity-map sweep; this fresh session has nothing loaded
+                    # Delete all chat logs (journal entries) for this user
+                    await db_session.execute(delete(ChatLog).where(ChatLog.user_id == user_id).execution_options(synchronize_session=False))
+                    # Delete all future messages for this user
+                    await db_session.execute(delete(FutureMessage).where(FutureMessage.user_id == user_id).execution_options(synchronize_session=False))
+                    await db_session.commit()
+                    _journal_analyzer().invalidate_user_cache(user_id)
+                    await ctx.send("✨ Successfully cleared all your journal entries and future messages!")
+                    return
+                except Exception as e:
+                    logger.error("Error clearing all data: %s", e)
+                    await db_session.rollback()
+                    await ctx.send("❌ An error occurred while clearing your data.")
+                    return
         
-        if clear_type.lower() == "journal":
-            if entry_number is not None:
-                # Get the specific entry
-                entries = (
-                    db_session.query(ChatLog)
-                    .filter(ChatLog.user_id == str(ctx.author.id))
-                    .order_by(ChatLog.timestamp.desc())
-                    .all()
-                )
+            if clear_type.lower() == "journal":
+                if entry_number is not None:
+                    # Get the specific entry (with the rows its delete cascades to, since
+                    # the async session can't lazy-load them during the flush)
+                    entry_to_delete = await db_session.scalar(
+                        select(ChatLog)
+                        .options(selectinload(ChatLog.sentiment), selectinload(ChatLog.capsule_entries))
+                        .filter(ChatLog.user_id == user_id)
+                        .order_by(ChatLog.timestamp.desc())
+                        .offset(entry_number - 1)
+                        .limit(1)
+                    ) if entry_number >= 1 else None
                 
-                if not entries or entry_number > len(entries) or entry_number < 1:
-                    await ctx.send(f"❌ Entry #{entry_number} not found. You have {len(entries)} entries.")
-                    return
+                    if entry_to_delete is None:
+                        total = await db_session.scalar(
+                            select(func.count(ChatLog.id)).filter(ChatLog.user_id == user_id)
+                        )
+                        await ctx.send(f"❌ Entry #{entry_number} not found. You have {total} entries.")
+                        return
                 
-                # Delete the specific entry
-                entry_to_delete = entries[entry_number - 1]
-                db_session.delete(entry_to_delete)
-                db_session.commit()
-                await ctx.send(f"✨ Successfully deleted journal entry #{entry_number}!")
-            else:
-                # Delete all journal entries
-                db_session.query(ChatLog).filter(ChatLog.user_id == str(ctx.author.id)).delete()
-                db_session.commit()
-                await ctx.send("✨ Successfully cleared all your journal entries!")
-        
-        elif clear_type.lower() == "futuremessages" or clear_type.lower() == "futuremessage":
-            if entry_number is not None:
-                # Get the specific future message
-                messages = (
-                    db_session.query(FutureMessage)
-                    .filter(FutureMessage.user_id == str(ctx.author.id))
-                    .order_by(FutureMessage.created_at.desc())
-                    .all()
-                )
+                    # Delete the specific entry
+                    await db_session.delete(entry_to_delete)
+                    await db_session.commit()
+                    _journal_analyzer().invalidate_user_cache(user_id)
+                    await ctx.send(f"✨ Successfully deleted journal entry #{entry_number}!")
+                else:
+                    # Delete all journal entries
+                    await db_session.execute(delete(ChatLog).where(ChatLog.user_id == user_id).execution_options(synchronize_session=False))
+                    await db_session.commit()
+                    _journal_analyzer().invalidate_user_cache(user_id)
+                    await ctx.send("✨ Successfully cleared all your journal entries!")
+        
+            elif clear_type.lower() == "futuremessages" or clear_type.lower() == "futuremessage":
+                if entry_number is not None:
+                    # Get the specific future message
+                    message_to_delete = await db_session.scalar(
+                        select(FutureMessage)
+                        .filter(FutureMessage.user_id == user_id)
+                        .order_by(FutureMessage.created_at.desc())
+                        .offset(entry_number - 1)
+                        .limit(1)
+                    ) if entry_number >= 1 else None
                 
-                if not messages or entry_number > len(messages) or entry_number < 1:
-                    await ctx.send(f"❌ Future message #{entry_number} not found. You have {len(messages)} messages.")
-                    return
+                    if message_to_delete is None:
+                        total = await db_session.scalar(
+                            select(func.count(FutureMessage.id)).filter(FutureMessage.user_id == user_id)
+                        )
+                        await ctx.send(f"❌ Future message #{entry_number} not found. You have {total} messages.")
+                        return
                 
-                # Delete the specific message
-                message_to_delete = messages[entry_number - 1]
-                db_session.delete(message_to_delete)
-                db_session.commit()
-                await ctx.send(f"✨ Successfully deleted future message #{entry_number}!")
-            else:
-                # Delete all future messages
-                db_session.query(FutureMessage).filter(FutureMessage.user_id == str(ctx.author.id)).delete()
-                db_session.commit()
-                await ctx.send("✨ Successfully cleared all your future messages!")
+                    # Delete the specific message
+                    await db_session.delete(message_to_delete)
+                    await db_session.commit()
+                    await ctx.send(f"✨ Successfully deleted future message #{entry_number}!")
+                else:
+                    # Delete all future messages
+                    await db_session.execute(delete(FutureMessage).where(FutureMessage.user_id == user_id).execution_options(synchronize_session=False))
+                    await db_session.commit()
+                    await ctx.send("✨ Successfully cleared all your future messages!")
         
-        else:
-            await ctx.send("❌ Invalid clear type. Use '!clear journal' or '!clear futureMessages'.")
+            else:
+                await ctx.send("❌ Invalid clear type. Use '!clear journal' or '!clear futureMessages'.")
     
     except Exception as e:
-        logger.error(f"Error in clear command: {str(e)}")
+        logger.error("Error in clear command: %s", e)
         await ctx.send("❌ An error occurred while processing your request.")
-    finally:
-        db_session.close()
+
+# Per-entry change in sentiment below which !history calls the trend stable
+TREND_SLOPE_THRESHOLD = 0.05
 
 @bot.command(name="history", help="View your recent journal entries and emotional trends")
 async def view_history(ctx, days: int = 7):
     """View recent journal history and emotional trends"""
+    user_id = str(ctx.author.id)
     try:
         # Get user's history
-        history = await journal_analyzer.get_user_history(str(ctx.author.id), limit=days)
+        history = await _journal_analyzer().get_user_history(user_id, limit=days)
         
         if not history:
             await ctx.send("No journal entries found for the specified time period.")
             return
         
         # Get emotional trends
-        trends = await journal_analyzer.get_emotional_trends(str(ctx.author.id), days=days)
+        trends = await _journal_analyzer().get_emotional_trends(user_id, days=days)
         
         # Create a summary message
-        response = f"📊 **Your Journal History (Last {days} entries)**\n\n"
+        response_parts = [f"📊 **Your Journal History (Last {days} entries)**\n\n"]
         
         # Add trend analysis
         if trends['dates']:
-            response += "**Emotional Journey:**\n"
-            response += "• Dominant Emotions: " + " → ".join(trends['dominant_emotions']) + "\n"
+            response_parts.append("**Emotional Journey:**\n")
+            response_parts.append("• Dominant Emotions: " + " → ".join(trends['dominant_emotions']) + "\n")
             
-            # Calculate overall trend
-            avg_start = sum(trends['compound_trend'][:3]) / 3 if len(trends['compound_trend']) >= 3 else trends['compound_trend'][0]
-            avg_end = sum(trends['compound_trend'][-3:]) / 3 if len(trends['compound_trend']) >= 3 else trends['compound_trend'][-1]
-            trend_direction = "improving" if avg_end > avg_start else "declining" if avg_end < avg_start else "stable"
+            # Calculate overall trend from the least-squares slope over all scored entries
+            trend = trends['compound_trend']
+            trend = trend[np.isfinite(trend)]
+            slope = float(np.polyfit(np.arange(trend.size), trend, 1)[0]) if trend.size >= 2 else 0.0
+            trend_direction = (
+                "improving" if slope > TREND_SLOPE_THRESHOLD
+                else "declining" if slope < -TREND_SLOPE_THRESHOLD
+                else "stable"
+            )
             
-            response += f"• Overall Trend: Your emotional state appears to be {trend_direction}\n\n"
+            response_parts.append(f"• Overall Trend: Your emotional state appears to be {trend_direction}\n\n")
         
         # Add recent entries with entry numbers
-        response += "**Recent Entries:**\n"
+        response_parts.append("**Recent Entries:**\n")
         for i, entry in enumerate(history, 1):  # Start numbering from 1
-            response += f"• Entry #{i} ({entry['timestamp'][:10]}): "
-            response += f"{entry['text'][:50]}... "
-            response += f"[{entry['sentiment']['dominant_emotion']} | Score: {entry['sentiment']['compound_score']:.2f}]\n"
+            response_parts.append(
+                f"• Entry #{i} ({entry['timestamp']:%Y-%m-%d}): "
+                f"{entry['text'][:50]}... "
+                f"[{entry['sentiment']['dominant_emotion']} | Score: {entry['sentiment']['compound_score']:.2f}]\n"
+            )
         
-        await ctx.send(response)
+        await ctx.send("".join(response_parts))
         
     except Exception as e:
-        logger.error(f"Error retrieving history: {str(e)}")
+        logger.error("Error retrieving history: %s", e)
         await ctx.send("I encountered an error while retrieving your journal history. Please try again later.")
 
 @bot.command(name="futureMessage", help="Save a message for your future self with AI-enhanced context")
 async def future_message(ctx, *, message: str):
     """Create a message for your future self with AI-enhanced context"""
+    user_id = str(ctx.author.id)
     try:
         # Create the future message with context
-        future_msg_dict, contextualized_message = await journal_analyzer.create_future_message(
-            str(ctx.author.id),
+        future_msg_dict, contextualized_message = await _with_llm_slot(ctx, lambda: _journal_analyzer().create_future_message(
+            user_id,
             ctx.author.name,
             message
-        )
+        ))
         
-        # Send the full message, splitting if necessary
-        intro = "✉️ **Message for Your Future Self**\n\n"
-        await ctx.send(intro)
-        
-        # Split message into chunks of ~1900 characters (Discord limit is 2000)
-        message_chunks = [contextualized_message[i:i+1900] 
-                        for i in range(0, len(contextualized_message), 1900)]
-        
-        for chunk in message_chunks:
-            await ctx.send(chunk)
+        # Send the intro and full message packed together, splitting only if necessary
+        sender = _MessageBuffer(ctx)
+        await sender.add("✉️ **Message for Your Future Self**\n\n")
+        await sender.add(contextualized_message)
+        await sender.flush()
         
     except Exception as e:
-        logger.error(f"Error creating future message: {str(e)}")
+        logger.error("Error creating future message: %s", e)
         await ctx.send("I encountered an error while saving your message for the future. Please try again later.")
 
 @bot.command(name="viewFutureMessages", help="View your saved messages for your future self")
 async def view_future_messages(ctx, limit: int = 5):
     """View your saved messages for your future self"""
+    user_id = str(ctx.author.id)
     try:
         # Get the user's future messages
-        messages = await journal_analyzer.get_future_messages(str(ctx.author.id), limit)
+        messages = await _journal_analyzer().get_future_messages(user_id, limit)
         
         if not messages:
             await ctx.send("You haven't saved any messages for your future self yet.")
             return
             
-        # Send header
-        await ctx.send("📝 **Your Messages to Your Future Self**\n")
+        # Headers, messages and separators are packed into as few Discord messages as possible
+        sender = _MessageBuffer(ctx)
+        await sender.add("📝 **Your Messages to Your Future Self**\n\n")
         
-        # Send each message separately with message numbers
+        # Add each message with its number
         for i, msg in enumerate(messages, 1):  # Start numbering from 1
-            # Send message header
             header = f"📅 **Message #{i}**\n"
-            header += f"**Date:** {msg['created_at'][:10]}\n"
+            header += f"**Date:** {msg['created_at']:%Y-%m-%d}\n"
             header += f"💭 **Feeling:** {msg['sentiment']['dominant_emotion'].title() if msg['sentiment'] else 'Unknown'}\n\n"
-            await ctx.send(header)
-            
-            # Split and send the full contextualized message
-            message_chunks = [msg['contextualized_message'][i:i+1900] 
-                            for i in range(0, len(msg['contextualized_message']), 1900)]
-            
-            for chunk in message_chunks:
-                await ctx.send(chunk)
+            await sender.add(header)
+            await sender.add(msg['contextualized_message'])
             
             # Add a separator between messages
-            await ctx.send("─" * 40 + "\n")
+            await sender.add(f"\n{SEPARATOR}\n")
+        await sender.flush()
         
     except Exception as e:
-        logger.error(f"Error retrieving future messages: {str(e)}")
+        logger.error("Error retrieving future messages: %s", e)
         await ctx.send("I encountered an error while retrieving your future messages. Please try again later.")
 
 @bot.command(name="reflect", help="Generate a reflection analysis of your past journal entries")
@@ -403,12 +924,14 @@ async def reflect(ctx, days: int = 30):
     Args:
         days: Number of past days to analyze (default: 30)
     """
+    user_id = str(ctx.author.id)
     try:
         # Send initial message to indicate processing
         await ctx.send("🤔 Analyzing your journal entries... This may take a moment.")
         
-        # Get reflection analysis
-        reflection = await journal_analyzer.analyze_reflection(str(ctx.author.id), days)
+        # Get reflection analysis, showing the typing indicator while it runs
+        async with ctx.typing():
+            reflection = await _with_llm_slot(ctx, lambda: _journal_analyzer().analyze_reflection(user_id, days))
         
         if not reflection["success"]:
             await ctx.send(reflection["message"])
@@ -422,33 +945,67 @@ async def reflect(ctx, days: int = 30):
             f"{metadata['date_range']['start']} to {metadata['date_range']['end']}\n\n"
         )
         
-        await ctx.send(header)
-        
-        # Split reflection text into chunks (Discord has a 2000 character limit)
-        reflection_text = reflection["reflection"]
-        chunks = [reflection_text[i:i+1900] for i in range(0, len(reflection_text), 1900)]
-        
-        # Send each chunk separately
-        for chunk in chunks:
-            await ctx.send(chunk)
+        # Pack header, reflection and footer into as few messages as possible
+        sender = _MessageBuffer(ctx)
+        await sender.add(header)
+        await sender.add(reflection["reflection"])
             
         # Add a footer with a suggestion
         footer = "\n💭 *Use `!reflect [days]` to analyze a different time period.*"
-        await ctx.send(footer)
+        await sender.add(footer)
+        await sender.flush()
         
     except Exception as e:
-        logger.error(f"Error in reflect command: {str(e)}")
+        logger.error("Error in reflect command: %s", e)
         await ctx.send("I encountered an error while generating your reflection. Please try again later.")
 
+# Month names for timeline labels, indexed by month number - 1 (as numpy's datetime64[M] gives them)
+MONTH_NAMES = ("January", "February", "March", "April", "May", "June",
+               "July", "August", "September", "October", "November", "December")
+MONTH_ABBREVIATIONS = tuple(name[:3] for name in MONTH_NAMES)
+
+def _format_timeline_month(entries: TimelineEntries, start: int, stop: int, month_label: str, day_labels: list[str]) -> str:
+    """
+    Format one month of timeline entries as a single message
+    
+    Args:
+        entries: Column-oriented timeline entries
+        start: Position of the month's first entry
+        stop: Position just past the month's last entry
+        month_label: Display label for the month (e.g. "January 2025")
+        day_labels: Precomputed "DD Mon" labels for every entry
+        
+    Returns:
+        The formatted month message
+    """
+    parts = [f"📅 **{month_label}**\n"]
+    # A month is a contiguous run, so walk plain slices of each column together
+    for e_date, emotion, score, content in zip(
+        day_labels[start:stop],
+        entries.dominant_emotions[start:stop],
+        entries.compound_scores[start:stop].tolist(),
+        entries.contents[start:stop]
+    ):
+        emotion = emotion.title() if emotion else "Unknown"
+        score = "" if math.isnan(score) else f" (Score: {score:.2f})"
+        
+        # Format entry with expandable preview
+        preview = content[:100] + "..." if len(content) > 100 else content
+        parts.append(f"\n• {e_date} - {emotion}{score}\n```{preview}```\n")
+    return "".join(parts)
+
 @bot.command(name="timeline", help="View your complete journal timeline with milestones and a reflective letter")
 async def timeline(ctx):
     """Generate and display an interactive timeline of all journal entries"""
+    user_id = str(ctx.author.id)
     try:
         # Send initial message to indicate processing
         processing_msg = await ctx.send("📊 Creating your journal timeline... This may take a moment.")
         
-        # Generate timeline analysis
-        timeline_data = await journal_analyzer.generate_timeline(str(ctx.author.id))
+        # The timeline arrives first and is sent while the reflective letter is still being written
+        sections = _journal_analyzer().generate_timeline(user_id)
+        async with ctx.typing():
+            _, timeline_data = await anext(sections)
         
         if not timeline_data["success"]:
             await ctx.send(timeline_data["message"])
@@ -457,97 +1014,82 @@ async def timeline(ctx):
         # Delete processing message
         await processing_msg.delete()
         
-        # Send timeline header with metadata
+        # Send header, sentiment trends and milestones together as one embed
         metadata = timeline_data["metadata"]
-        header = (
-            f"📚 **Your Journal Timeline**\n"
-            f"Analyzing {metadata['entry_count']} entries from "
-            f"{metadata['date_range']['start']} to {metadata['date_range']['end']}\n\n"
+        summary = discord.Embed(
+            title="📚 Your Journal Timeline",
+            description=(
+                f"Analyzing {metadata['entry_count']} entries from "
+                f"{metadata['date_range']['start']} to {metadata['date_range']['end']}"
+            )
         )
-        await ctx.send(header)
         
-        # Send sentiment trends
         trends = timeline_data["timeline"]["sentiment_trends"]
-        trends_msg = (
-            "**Overall Journey**\n"
-            f"• Time Period: {trends['start_period']} → {trends['end_period']}\n"
-            f"• Emotional Direction: Your sentiment has been {trends['overall_direction']}\n"
-            f"• Recent Dominant Emotions: {', '.join(trends['dominant_emotions'])}\n\n"
+        summary.add_field(
+            name="Overall Journey",
+            value=(
+                f"• Time Period: {trends['start_period']} → {trends['end_period']}\n"
+                f"• Emotional Direction: Your sentiment has been {trends['overall_direction']}\n"
+                f"• Recent Dominant Emotions: {', '.join(trends['dominant_emotions'])}"
+            ),
+            inline=False
         )
-        await ctx.send(trends_msg)
         
-        # Send milestones
+        # The remaining sections are packed into as few messages as the 2000 character limit allows
+        sender = _MessageBuffer(ctx)
+        
         if timeline_data["timeline"]["milestones"]:
-            milestones_msg = "**Key Milestones**\n"
-            for milestone in timeline_data["timeline"]["milestones"]:
-                milestones_msg += f"• {milestone['date']}: {milestone['description']}\n"
-            await ctx.send(milestones_msg + "\n")
+            milestones_text = "\n".join(
+                f"• {milestone['date']}: {milestone['description']}"
+                for milestone in timeline_data["timeline"]["milestones"]
+            )
+            # Embed field values are capped at 1024 characters; longer lists go out as plain text
+            if len(milestones_text) <= EMBED_FIELD_LIMIT:
+                summary.add_field(name="Key Milestones", value=milestones_text, inline=False)
+            else:
+                await sender.add(f"**Key Milestones**\n{milestones_text}\n\n")
+        
+        await ctx.send(embed=summary)
         
         # Create interactive timeline
         entries = timeline_data["timeline"]["entries"]
-        current_month = None
-        month_entries = []
         
-        for entry in entries:
-            entry_date = datetime.fromisoformat(entry["timestamp"])
-            month_key = entry_date.strftime("%B %Y")
-            
-            # If we've moved to a new month, send the previous month's entries
-            if month_key != current_month and current_month is not None:
-                month_msg = f"📅 **{current_month}**\n"
-                for e in month_entries:
-                    e_date = datetime.fromisoformat(e["timestamp"]).strftime("%d %b")
-                    sentiment = e["sentiment"]
-                    emotion = sentiment["dominant_emotion"].title() if sentiment else "Unknown"
-                    score = f" (Score: {sentiment['compound_score']:.2f})" if sentiment else ""
-                    
-                    # Format entry with expandable preview
-                    preview = e["content"][:100] + "..." if len(e["content"]) > 100 else e["content"]
-                    month_msg += f"\n• {e_date} - {emotion}{score}\n```{preview}```\n"
-                
-                await ctx.send(month_msg)
-                month_entries = []
-            
-            current_month = month_key
-            month_entries.append(entry)
-        
-        # Send the last month's entries
-        if month_entries:
-            month_msg = f"📅 **{current_month}**\n"
-            for e in month_entries:
-                e_date = datetime.fromisoformat(e["timestamp"]).strftime("%d %b")
-                sentiment = e["sentiment"]
-                emotion = sentiment["dominant_emotion"].title() if sentiment else "Unknown"
-                score = f" (Score: {sentiment['compound_score']:.2f})" if sentiment else ""
-                
-                # Format entry with expandable preview
-                preview = e["content"][:100] + "..." if len(e["content"]) > 100 else e["content"]
-                month_msg += f"\n• {e_date} - {emotion}{score}\n```{preview}```\n"
-            
-            await ctx.send(month_msg)
+        # Entries are sorted by time, so each month is a contiguous run between change points
+        months = entries.timestamps.astype("datetime64[M]")
+        change_points = np.flatnonzero(months[1:] != months[:-1]) + 1
         
-        # Send the reflective letter
-        await ctx.send("\n📝 **A Letter from Your Past Self**\n")
+        # Split dates into year/month/day with datetime64 arithmetic instead of strftime per entry
+        month_numbers = months.astype(np.int64)  # Months since 1970-01
+        days = (entries.timestamps.astype("datetime64[D]") - months).astype(np.int64) + 1
+        day_labels = [
+            f"{day:02d} {MONTH_ABBREVIATIONS[month % 12]}"
+            for day, month in zip(days.tolist(), month_numbers.tolist())
+        ]
         
-        # Split letter into chunks if needed
-        letter_chunks = [timeline_data["reflective_letter"][i:i+1900] 
-                        for i in range(0, len(timeline_data["reflective_letter"]), 1900)]
+        boundaries = [0, *change_points.tolist(), len(entries)]
+        for start, stop in zip(boundaries, boundaries[1:]):
+            month = int(month_numbers[start])
+            month_label = f"{MONTH_NAMES[month % 12]} {1970 + month // 12}"
+            await sender.add(_format_timeline_month(entries, start, stop, month_label, day_labels))
         
-        for chunk in letter_chunks:
-            await ctx.send(chunk)
+        await sender.flush()
+        
+        # Send the reflective letter once it is ready
+        async with ctx.typing():
+            _, letter = await _with_llm_slot(ctx, lambda: anext(sections))
+        
+        if letter["success"]:
+            await sender.add("📝 **A Letter from Your Past Self**\n")
+            await sender.add(letter["reflective_letter"])
+        else:
+            await sender.add("📝 I couldn't write your reflective letter this time. Please try again later.\n")
         
         # Add footer with usage tips
-        footer = (
-            "\n💡 **Timeline Tips**:\n"
-            "• Entries are grouped by month for easy navigation\n"
-            "• Each entry shows the date, dominant emotion, and sentiment score\n"
-            "• Use `!journal` to add new entries\n"
-            "• Use `!reflect` for a focused analysis of recent entries"
-        )
-        await ctx.send(footer)
+        await sender.add(TIMELINE_FOOTER)
+        await sender.flush()
         
     except Exception as e:
-        logger.error(f"Error generating timeline: {str(e)}")
+        logger.error("Error generating timeline: %s", e)
         await ctx.send("I encountered an error while generating your timeline. Please try again later.")
 
 @bot.command(name="feedback", help="Submit feedback about your time capsule experience. Rating (1-5) and feedback text are required.")
@@ -559,6 +1101,7 @@ async def submit_feedback(ctx, rating: int, *, feedback_text: str):
         rating: Rating from 1-5 (required)
         feedback_text: The feedback text (required)
     """
+    user_id = str(ctx.author.id)
     try:
         # Validate rating
         if not (1 <= rating <= 5):
@@ -569,57 +1112,48 @@ async def submit_feedback(ctx, rating: int, *, feedback_text: str):
         await ctx.send("📝 Processing your feedback... Thank you for helping us improve!")
         
         # Store and analyze feedback
-        result = await journal_analyzer.store_feedback(
-            str(ctx.author.id),
+        result = await _with_llm_slot(ctx, lambda: _journal_analyzer().store_feedback(
+            user_id,
             ctx.author.name,
             feedback_text,
             rating
-        )
+        ))
         
         if not result["success"]:
             await ctx.send("❌ I encountered an error while processing your feedback. Please try again later.")
             return
         
-        # Format the response
-        response = "✨ **Thank you for your feedback!**\n\n"
-        
-        # Add rating
-        response += f"Your Rating: {'⭐' * rating}\n\n"
-        
-        # Add sentiment analysis
+        # Format the response: rating, sentiment analysis, then the AI analysis
         sentiment = result["sentiment"]
-        response += f"Feedback Tone: {sentiment['dominant_emotion'].title()}\n"
-        response += f"Overall Sentiment: {sentiment['compound_score']:.2f}\n\n"
-        
-        # Add AI analysis
-        response += "**Analysis of Your Feedback:**\n"
-        
-        # Split analysis into chunks if needed
-        analysis_chunks = [result["analysis"][i:i+1900] for i in range(0, len(result["analysis"]), 1900)]
+        response = (
+            "✨ **Thank you for your feedback!**\n\n"
+            f"Your Rating: {'⭐' * rating}\n\n"
+            f"Feedback Tone: {sentiment['dominant_emotion'].title()}\n"
+            f"Overall Sentiment: {sentiment['compound_score']:.2f}\n\n"
+            "**Analysis of Your Feedback:**\n"
+        )
         
-        # Send the response and analysis
-        await ctx.send(response)
-        for chunk in analysis_chunks:
-            await ctx.send(chunk)
+        # Send the response and analysis packed together, splitting only if necessary
+        sender = _MessageBuffer(ctx)
+        await sender.add(response)
+        await sender.add(result["analysis"])
+        await sender.flush()
         
     except Exception as e:
-        logger.error(f"Error in feedback command: {str(e)}")
+        logger.error("Error in feedback command: %s", e)
         await ctx.send("❌ I encountered an error while processing your feedback. Please try again later.")
 
 @bot.command(name="viewFeedback", help="View analysis of all feedback (System designers only)")
+@admin_only
 async def view_feedback(ctx):
     """View analysis of all feedback and trends"""
     try:
-        # Check if user is authorized
-        if str(ctx.author.id) not in AUTHORIZED_USERS:
-            await ctx.send("⚠️ This command is only available to system designers.")
-            return
-        
         # Send initial message
         await ctx.send("📊 Analyzing feedback trends... This may take a moment.")
         
-        # Get feedback analysis
-        analysis = await journal_analyzer.analyze_feedback_trends()
+        # Get feedback analysis, showing the typing indicator while it runs
+        async with ctx.typing():
+            analysis = await _with_llm_slot(ctx, lambda: _journal_analyzer().analyze_feedback_trends())
         
         if not analysis["success"]:
             await ctx.send(analysis["message"])
@@ -639,19 +1173,18 @@ async def view_feedback(ctx):
         if metadata['average_sentiment']:
             header += f"Average Sentiment: {metadata['average_sentiment']:.2f}\n"
         
-        await ctx.send(header)
-        
-        # Split analysis into chunks and send
-        analysis_chunks = [analysis["trends_analysis"][i:i+1900] for i in range(0, len(analysis["trends_analysis"]), 1900)]
-        for chunk in analysis_chunks:
-            await ctx.send(chunk)
+        # Pack header, analysis and footer into as few messages as possible
+        sender = _MessageBuffer(ctx)
+        await sender.add(header)
+        await sender.add(analysis["trends_analysis"])
         
         # Add a footer
         footer = "\n💡 *Use `!feedback <rating> <message>` to submit new feedback.*"
-        await ctx.send(footer)
+        await sender.add(footer)
+        await sender.flush()
         
     except Exception as e:
-        logger.error(f"Error in viewFeedback command: {str(e)}")
+        logger.error("Error in viewFeedback command: %s", e)
         await ctx.send("❌ I encountered an error while retrieving feedback analysis. Please try again later.")
 
 @bot.command(name="dashboard", help="View your mood trends dashboard with interactive charts")
@@ -662,12 +1195,14 @@ async def view_dashboard(ctx, days: int = 30):
     Args:
         days: Number of past days to analyze (default: 30)
     """
+    user_id = str(ctx.author.id)
     try:
-        # Send initial message
-        await ctx.send("📊 Generating your mood trends dashboard... This may take a moment.")
-        
-        # Generate dashboard
-        result = dashboard.generate_mood_trends(str(ctx.author.id), days)
+        # Send the initial message while the dashboard is generated; the query and chart
+        # rendering are blocking, so they run in a worker thread
+        _, result = await asyncio.gather(
+            ctx.send("📊 Generating your mood trends dashboard... This may take a moment."),
+            asyncio.to_thread(_dashboard().generate_mood_trends, user_id, days)
+        )
         
         if not result["success"]:
             await ctx.send(result["message"])
@@ -682,34 +1217,14 @@ async def view_dashboard(ctx, days: int = 30):
             f"I've analyzed your journal entries from {stats['date_range']['start']} to {stats['date_range']['end']}, "
             f"processing {stats['total_entries']} entries to create a comprehensive emotional journey visualization.\n\n"
         )
-        await ctx.send(header_msg)
         
-        # Send the chart
-        await ctx.send(file=discord.File(result["chart_path"]))
+        # Send the header with the chart attached
+        sender = _MessageBuffer(ctx)
+        await sender.add(header_msg)
+        await sender.flush(file=discord.File(io.BytesIO(result["chart_bytes"]), filename="dashboard.png"))
         
         # Detailed explanation of the charts
-        chart_explanation = (
-            "**📊 Understanding Your Dashboard**\n\n"
-            "The dashboard shows two interconnected charts:\n\n"
-            "**1. Overall Sentiment Trend (Top Chart)**\n"
-            "• Blue line shows your overall emotional state over time\n"
-            "• Range from -1 (very negative) to +1 (very positive)\n"
-            "• Each point represents a journal entry\n"
-            "• Hover over points to see exact dates and scores\n\n"
-            "**2. Emotional Components (Bottom Chart)**\n"
-            "• Shows the intensity of 8 core emotions:\n"
-            "  - Joy (Yellow) 🌟\n"
-            "  - Trust (Green) 🤝\n"
-            "  - Fear (Red) 😨\n"
-            "  - Surprise (Purple) 😮\n"
-            "  - Sadness (Blue) 😢\n"
-            "  - Disgust (Orange) 😖\n"
-            "  - Anger (Dark Red) 😠\n"
-            "  - Anticipation (Teal) 🎯\n\n"
-            "• Each emotion is tracked on a scale of 0 to 1\n"
-            "• Lines show how each emotion fluctuates over time\n"
-        )
-        await ctx.send(chart_explanation)
+        await sender.add(DASHBOARD_EXPLANATION)
         
         # Detailed analysis of the user's emotional patterns
         analysis_msg = (
@@ -730,188 +1245,214 @@ async def view_dashboard(ctx, days: int = 30):
             "• Use `!reflect` to get deeper insights into specific time periods\n"
             "• Compare this dashboard with your `!timeline` to see the bigger picture\n"
         )
-        await ctx.send(analysis_msg)
-        
-        # Clean up old charts
-        dashboard.cleanup_old_charts()
+        await sender.add(analysis_msg)
+        await sender.flush()
         
     except Exception as e:
-        logger.error(f"Error in dashboard command: {str(e)}")
+        logger.error("Error in dashboard command: %s", e)
         await ctx.send("❌ I encountered an error while generating your dashboard. Please try again later.")
 
 @bot.command(name="lifeStory", help="Generate an interactive narrative of your journaling journey")
 async def life_story(ctx):
     """Generate and display an interactive life story from journal entries"""
+    user_id = str(ctx.author.id)
     try:
         # Send initial message
         processing_msg = await ctx.send("📖 Creating your life story... This may take a moment.")
         
         # Generate life story
-        story = await journal_analyzer.generate_life_story(str(ctx.author.id))
+        story = await _with_llm_slot(ctx, lambda: _journal_analyzer().generate_life_story(user_id))
         
         if not story["success"]:
-            await ctx.send(story["message"])
+            await processing_msg.edit(content=story["message"])
             return
         
-        # Delete processing message
-        await processing_msg.delete()
-
-        # Define number emojis first
-        number_emojis = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣"]
-
-        # Helper function to split and send messages
-        async def send_chunked_message(content, max_length=1000):
-            """Split and send a message in chunks"""
-            chunks = []
-            current_chunk = ""
-            
-            for line in content.split('\n'):
-                if len(current_chunk) + len(line) + 1 > max_length:
-                    chunks.append(current_chunk)
-                    current_chunk = line
-                else:
-                    current_chunk += ('\n' + line if current_chunk else line)
-            
-            if current_chunk:
-                chunks.append(current_chunk)
-            
-            for chunk in chunks:
-                if chunk.strip():  # Only send non-empty chunks
-                    await ctx.send(chunk)
-        
-        # Send metadata in smaller chunks
+        # Overview, chapter list and navigation tips go out together as one embed, which
+        # replaces the processing message rather than following its deletion
         metadata = story["metadata"]
-        await send_chunked_message(
-            "📚 **Your Life Story Through Journaling**\n\n"
-            f"Based on {metadata['total_entries']} journal entries from "
-            f"{metadata['date_range']['start']} to {metadata['date_range']['end']}\n"
-            f"Featuring {metadata['significant_events']} significant moments."
-        )
-        
-        await send_chunked_message(
-            f"\nYour emotional journey has shown {metadata['emotional_journey']['major_shifts']} major shifts, "
-            f"with an {metadata['emotional_journey']['overall_arc']} trajectory.\n\n"
-            "Click on the chapter numbers below to explore your story."
+        overview = discord.Embed(
+            title="📚 Your Life Story Through Journaling",
+            description=(
+                f"Based on {metadata['total_entries']} journal entries from "
+                f"{metadata['date_range']['start']} to {metadata['date_range']['end']}\n"
+                f"Featuring {metadata['significant_events']} significant moments.\n\n"
+                f"Your emotional journey has shown {metadata['emotional_journey']['major_shifts']} major shifts, "
+                f"with an {metadata['emotional_journey']['overall_arc']} trajectory."
+            )
         )
         
-        await ctx.send("─" * 40)
+        # Everything after the overview is packed into as few messages as possible
+        sender = _MessageBuffer(ctx)
+        reactions = None
         
         # Only proceed with chapters if there are story sections
         if story["story_sections"]:
-            # Create and send table of contents with emojis
-            toc = "**📑 Chapters**\n"
-            toc += "React to the numbers below to read each chapter:\n\n"
+            # Chapters are joined and packed once here rather than on every reaction
+            for section in story["story_sections"]:
+                section["_chunks"] = tuple(_pack("\n".join(section["content"])))
             
-            # Store story sections for reaction handling
-            ctx.bot.story_sections = story["story_sections"]
-            
-            # Add chapters with their corresponding emojis
+            # Add chapters with their corresponding emojis and a short teaser
+            overview.description += "\n\n**📑 Chapters** - react to the numbers below to read each chapter:"
             for i, section in enumerate(story["story_sections"]):
-                toc += f"{number_emojis[i]} {section['title']}\n"
+                teaser = textwrap.shorten(" ".join(section["content"]), 200, placeholder="...")
+                overview.add_field(name=f"{NUMBER_EMOJIS[i]} {section['title']}", value=teaser or "—", inline=False)
+            overview.set_footer(text=LIFE_STORY_TIPS)
             
-            # Send table of contents and store the message for reactions
-            toc_msg = await ctx.send(toc)
+            # Reactions are attached to the overview, which doubles as the table of contents
+            toc_msg = await processing_msg.edit(content=None, embed=overview)
             
-            # Add reactions to the table of contents message
-            for i in range(len(story["story_sections"])):
-                try:
-                    await toc_msg.add_reaction(number_emojis[i])
-                except Exception as e:
-                    logger.error(f"Error adding reaction: {str(e)}")
+            # Store story sections for reaction handling, keyed by the message they belong to
+            _remember_story(toc_msg.id, story["story_sections"])
             
-            await ctx.send("─" * 40)
+            # Add reactions to the table of contents message concurrently; discord.py's
+            # rate limiter queues them on the reaction bucket in the order they are started.
+            # The chapter and events are sent meanwhile, and the reactions awaited at the end
+            reactions = asyncio.gather(
+                *(toc_msg.add_reaction(NUMBER_EMOJIS[i]) for i in range(len(story["story_sections"]))),
+                return_exceptions=True
+            )
             
             # Send the prologue (first section) automatically
             first_section = story["story_sections"][0]
-            await ctx.send(f"**{first_section['title']}**\n")
+            await sender.add(f"**{first_section['title']}**\n")
             
-            # Split content into very small chunks
-            content = "\n".join(first_section['content'])
-            await send_chunked_message(content)
-            await ctx.send("─" * 40)
+            # Pack the chapter on paragraph/line/word boundaries
+            for chunk in first_section["_chunks"]:
+                await sender.add(chunk)
+                await sender.add("\n")
+            await sender.add(SEPARATOR + "\n")
         else:
-            await ctx.send("No chapters available in your story yet. Try adding more journal entries!")
+            await processing_msg.edit(content=None, embed=overview)
+            await sender.add("No chapters available in your story yet. Try adding more journal entries!\n")
         
-        # Send timeline of events in small chunks
-        await ctx.send("**📅 Key Moments**\n")
+        # Send timeline of events
+        await sender.add("**📅 Key Moments**\n")
         
+        event_parts = []
         for event in story["events"]:
-            emotion_indicator = "📈" if event.get("sentiment", 0) > 0 else "📉" if event.get("sentiment", 0) < 0 else "📊"
-            event_text = (
+            sentiment = event.get("sentiment", 0)
+            emotion_indicator = SENTIMENT_EMOJIS[1 + (sentiment > 0) - (sentiment < 0)]
+            event_parts.append(
                 f"{emotion_indicator} **{event['date']}**\n"
-                f"• {event['content'][:100]}...\n"
-                f"• Feeling: {event.get('dominant_emotion', 'Mixed emotions').title()}\n"
+                f"• {textwrap.shorten(event['content'], 100, placeholder='...')}\n"
+                f"• Feeling: {event.get('dominant_emotion', 'Mixed emotions').title()}"
             )
-            await ctx.send(event_text)
         
-        await ctx.send("─" * 40)
+        # Pack whole events together so none is split across messages
+        for chunk in _pack("\n".join(event_parts)):
+            await sender.add(chunk)
+            await sender.add("\n")
         
-        # Send footer tips in chunks
-        footer_tips = [
-            "💡 **Story Navigation Tips:**",
-            "• React to the number emojis above to read each chapter",
-            "• Each chapter focuses on a distinct phase of your journey",
-            "• The timeline shows key moments that shaped your story",
-            "• Use `!reflect` to dive deeper into specific periods"
-        ]
+        await sender.flush()
         
-        for tip in footer_tips:
-            await ctx.send(tip)
+        if reactions is not None:
+            for result in await reactions:
+                if isinstance(result, Exception):
+                    logger.error("Error adding reaction: %s", result)
         
     except Exception as e:
-        logger.error(f"Error generating life story: {str(e)}")
+        logger.error("Error generating life story: %s", e)
         await ctx.send("❌ I encountered an error while creating your life story. Please try again later.")
 
+# Story sections by table of contents message id, so each reader navigates their own story.
+# Entries expire after STORY_TTL and the oldest are dropped beyond STORY_CACHE_SIZE; with one
+# TTL for all, insertion order is also expiry order
+STORY_TTL = 60 * 60  # seconds
+STORY_CACHE_SIZE = 1024
+_stories = {}
+
+def _remember_story(message_id: int, sections: list):
+    """
+    Store a story's sections for navigation by reactions on its table of contents
+    
+    Args:
+        message_id: The table of contents message
+        sections: The story sections, with their chapters already packed
+    """
+    now = asyncio.get_running_loop().time()
+    while _stories and (len(_stories) >= STORY_CACHE_SIZE or next(iter(_stories.values()))[0] <= now):
+        _stories.pop(next(iter(_stories)))
+    _stories[message_id] = (now + STORY_TTL, sections)
+
+def _story_sections(message_id: int) -> list | None:
+    """Return the sections of the story told in a table of contents message, or None if unknown or expired"""
+    stored = _stories.get(message_id)
+    if stored is None:
+        return None
+    expires_at, sections = stored
+    if asyncio.get_running_loop().time() >= expires_at:
+        del _stories[message_id]
+        return None
+    return sections
+
+# Chapters are posted to the whole channel, so repeat reactions within the cooldown
+# (toggling a reaction, several readers) reuse the copy that was just sent
+CHAPTER_COOLDOWN = 5.0  # seconds
+_recent_chapters = {}
+
+def _chapter_recently_sent(message_id: int, section_index: int) -> bool:
+    """
+    Check whether a chapter was sent within the cooldown, recording it as sent if not
+    
+    Args:
+        message_id: The table of contents message that was reacted to
+        section_index: The chapter that was requested
+        
+    Returns:
+        True if the chapter should be skipped
+    """
+    now = asyncio.get_running_loop().time()
+    key = (message_id, section_index)
+    last_sent = _recent_chapters.get(key)
+    if last_sent is not None and now - last_sent < CHAPTER_COOLDOWN:
+        return True
+    
+    # Prune expired entries now and then so the map stays small
+    if len(_recent_chapters) >= 256:
+        for stale_key in [k for k, sent in _recent_chapters.items() if now - sent >= CHAPTER_COOLDOWN]:
+            del _recent_chapters[stale_key]
+    _recent_chapters[key] = now
+    return False
+
 @bot.event
 async def on_reaction_add(reaction, user):
     """Handle reactions for story navigation"""
-    if user.bot:
-        return
-        
     # Check if this is a story navigation reaction
-    if not hasattr(bot, 'story_sections'):
+    section_index = NUMBER_EMOJI_INDEX.get(reaction.emoji)
+    if user.bot or section_index is None:
+        return
+    story_sections = _story_sections(reaction.message.id)
+    if story_sections is None:
         return
         
-    number_emojis = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣"]
-    if reaction.emoji in number_emojis:
+    if not _chapter_recently_sent(reaction.message.id, section_index):
         try:
             # Get the corresponding story section
-            section_index = number_emojis.index(reaction.emoji)
-            if section_index < len(bot.story_sections):
-                section = bot.story_sections[section_index]
+            if section_index < len(story_sections):
+                section = story_sections[section_index]
+                sender = _MessageBuffer(reaction.message.channel)
                 
                 # Send the chapter title
-                await reaction.message.channel.send(f"**{section['title']}**\n")
-                
-                # Split content into very small chunks
-                content = "\n".join(section['content'])
-                chunks = [content[i:i+1000] for i in range(0, len(content), 1000)]
+                await sender.add(f"**{section['title']}**\n")
                 
-                # Send each chunk separately
-                for chunk in chunks:
-                    if chunk.strip():  # Only send non-empty chunks
-                        await reaction.message.channel.send(chunk)
+                # Pack the chapter into as few messages as possible, splitting on paragraph/line/word boundaries
+                for chunk in section["_chunks"]:
+                    await sender.add(chunk)
+                    await sender.add("\n")
                 
-                await reaction.message.channel.send("─" * 40)
+                # The separator rides along with the last chunk rather than going out on its own
+                await sender.add(SEPARATOR)
+                await sender.flush()
                     
         except Exception as e:
-            logger.error(f"Error handling story reaction: {str(e)}")
-            await reaction.message.channel.send("❌ I encountered an error while navigating your story. Please try again.")
-
-@bot.command(name="menu", help="Display all available commands and their usage")
-async def menu(ctx):
-    """Display all available commands and their usage"""
-    
-    # Helper function to send message chunks
-    async def send_menu_section(title, content):
-        message = f"{title}\n{content}\n"
-        await ctx.send(message)
-
-    # Introduction
-    await ctx.send("🤖 **Available Commands**\n")
-    
-    # Journaling Commands
-    journaling_text = (
+            logger.error("Error handling story reaction: %s", e)
+            await _sender_for(reaction.message.channel).send("❌ I encountered an error while navigating your story. Please try again.")
+
+# The menu never changes, so it is assembled into a single embed once at import time;
+# each section's first line becomes its field name
+MENU_TITLE = "🤖 Available Commands"
+MENU_SECTIONS = (
+    (
         "📝 **Journaling**\n"
         "`!journal <message>` - Log a journal entry and get sentiment analysis\n"
         "`!history [days=7]` - View your recent journal entries and emotional trends\n"
@@ -921,11 +1462,8 @@ async def menu(ctx):
         "• Receive personalized writing prompts if you haven't journaled in a while\n"
         "• Prompts are tailored to your emotional patterns and previous entries\n"
         "• Sent automatically via DM to help maintain your journaling practice"
-    )
-    await send_menu_section("", journaling_text)
-
-    # Memory Capsules Commands
-    memory_capsules_text = (
+    ),
+    (
         "📔 **Memory Capsules**\n"
         "`!createCapsule <name> [description]` - Create a new themed memory capsule\n"
         "`!addToCapsule <capsule_id> <entry_number>` - Add an entry to a capsule\n"
@@ -936,19 +1474,13 @@ async def menu(ctx):
         "• Create themed capsules for different aspects of your life\n"
         "• Use entry numbers from `!history` when adding to capsules\n"
         "• Each capsule generates its own themed narrative"
-    )
-    await send_menu_section("", memory_capsules_text)
-
-    # Time Capsule Commands
-    time_capsule_text = (
+    ),
+    (
         "⏳ **Time Capsule**\n"
         "`!futureMessage <message>` - Save a message for your future self\n"
         "`!viewFutureMessages [limit=5]` - View your saved messages"
-    )
-    await send_menu_section("", time_capsule_text)
-    
-    # Analysis & Gamification Commands
-    analysis_text = (
+    ),
+    (
         "📊 **Analysis & Gamification**\n"
         "`!sentiment` - Get sentiment analysis for recent messages\n"
         "`!dashboard [days=30]` - View your mood trends dashboard\n"
@@ -957,30 +1489,21 @@ async def menu(ctx):
         "`!profile` - View your journaling stats and achievements\n"
         "`!leaderboard [category]` - View top users in different categories\n"
         "  Categories: entries, streak, words, reflection, achievements"
-    )
-    await send_menu_section("", analysis_text)
-
-    # Data Management Commands
-    data_mgmt_text = (
+    ),
+    (
         "🗑️ **Data Management**\n"
         "`!clear` - Clear all your journal entries and future messages\n"
         "`!clear journal` - Clear all your journal entries\n"
         "`!clear journal <entry_number>` - Delete a specific journal entry\n"
         "`!clear futureMessages` - Clear all your future messages\n"
         "`!clear futureMessage <message_number>` - Delete a specific future message"
-    )
-    await send_menu_section("", data_mgmt_text)
-    
-    # Feedback Commands
-    feedback_text = (
+    ),
+    (
         "💭 **Feedback**\n"
         "`!feedback <rating> <message>` - Submit feedback (rating: 1-5 required)\n"
         "`!viewFeedback` - View analysis of all feedback (Admin only)"
-    )
-    await send_menu_section("", feedback_text)
-
-    # Parameter Notation and Tips
-    help_text = (
+    ),
+    (
         "📌 **Parameter Notation**\n"
         "• `<parameter>` - Required parameter\n"
         "• `[parameter]` - Optional parameter\n"
@@ -992,62 +1515,50 @@ async def menu(ctx):
         "• Entry numbers are shown in `!history` and `!viewFutureMessages` commands\n"
         "• Enable DMs to receive personalized journaling prompts"
     )
-    await send_menu_section("", help_text)
+)
+ADMIN_MENU_SECTION = (
+    "🔧 **Admin Commands**\n"
+    "`!testPrompt [user_id]` - Test journaling prompt generation\n"
+    "`!viewFeedback` - View analysis of all feedback\n"
+    "`!cacheStats` - View response and sentiment cache hit rates"
+)
+
+def _menu_embed(sections: tuple) -> discord.Embed:
+    """Build the menu embed, one field per section (each fits the field limit, all fit the embed)"""
+    embed = discord.Embed(title=MENU_TITLE)
+    for section in sections:
+        heading, body = section.split("\n", 1)
+        embed.add_field(name=heading.replace("**", ""), value=body, inline=False)
+    return embed
+
+MENU_EMBED = _menu_embed(MENU_SECTIONS)
+ADMIN_MENU_EMBED = _menu_embed(MENU_SECTIONS + (ADMIN_MENU_SECTION,))
 
+@bot.command(name="menu", help="Display all available commands and their usage")
+async def menu(ctx):
+    """Display all available commands and their usage"""
     # Add Admin Commands section if user is authorized
-    if str(ctx.author.id) in AUTHORIZED_USERS:
-        admin_text = (
-            "🔧 **Admin Commands**\n"
-            "`!testPrompt [user_id]` - Test journaling prompt generation\n"
-            "`!viewFeedback` - View analysis of all feedback"
-        )
-        await send_menu_section("", admin_text)
+    await ctx.send(embed=ADMIN_MENU_EMBED if _is_admin(ctx) else MENU_EMBED)
 
 @bot.command(name="testPrompt", help="(Admin only) Test the journaling prompt generation for a user")
+@admin_only
 async def test_prompt(ctx, user_id: str = None):
     """
     Test the journaling prompt generation system
     If no user_id is provided, generates a prompt for the command user
     """
-    # Check if user is authorized
-    if str(ctx.author.id) not in AUTHORIZED_USERS:
-        await ctx.send("⚠️ This command is only available to system administrators.")
-        return
-
     try:
         # If no user_id provided, use the command author's ID
         target_user_id = user_id or str(ctx.author.id)
-        db_session = Session()
 
         try:
             # Get user's emotional history for context
-            user_history = await journal_analyzer.get_emotional_trends(target_user_id, days=30)
-            
-            # Create a prompt based on user's history
-            prompt_context = f"""Generate a personalized journaling prompt for a user who hasn't written in their journal for a while.
-
-User's recent emotional trends:
-- Dominant emotions: {' → '.join(user_history.get('dominant_emotions', ['No data']))}
-- Last entry was more than 7 days ago
-
-Create an engaging, thoughtful prompt that:
-1. Acknowledges their absence without being judgmental
-2. Relates to their emotional patterns
-3. Encourages self-reflection
-4. Is specific enough to spark ideas but open-ended enough for personal expression
-
-Format the response as a warm, inviting message that makes them want to start writing again."""
-
-            # Generate personalized prompt using Mistral
-            prompt_response = await agent.client.chat.complete_async(
-                model="mistral-large-latest",
-                messages=[
-                    {"role": "system", "content": "You are an empathetic journaling assistant."},
-                    {"role": "user", "content": prompt_context}
-                ]
-            )
+            user_history = await _journal_analyzer().get_emotional_trends(target_user_id, days=30)
             
-            personalized_prompt = prompt_response.choices[0].message.content.strip()
+            # Generate the prompt exactly as the daily reminder would; the reply is a JSON array,
+            # so there is nothing useful to stream, but the admin sees that it's being written
+            async with ctx.typing():
+                personalized_prompt, = await _with_llm_slot(ctx, lambda: _reminder_prompts([user_history]))
             
             # Send the prompt in the channel for testing
             test_message = (
@@ -1055,12 +1566,7 @@ Format the response as a warm, inviting message that makes them want to start wr
                 f"Generated prompt for user ID: {target_user_id}\n\n"
                 "**The following message would be sent via DM:**\n"
                 "───────────────────────\n\n"
-                "📝 **Time for a Journal Entry!**\n\n"
-                f"Hey there! I noticed it's been a while since your last journal entry. "
-                "I've created a special prompt just for you:\n\n"
-                f"{personalized_prompt}\n\n"
-                "Ready to write? Just use the `!journal` command in our chat to share your thoughts!\n"
-                "💭 *Your journal is a safe space for self-reflection and growth.*\n\n"
+                f"{REMINDER_DM_TEMPLATE.format(username='there', prompt=personalized_prompt)}\n\n"
                 "───────────────────────\n\n"
                 "✨ **Test Complete!**"
             )
@@ -1069,13 +1575,29 @@ Format the response as a warm, inviting message that makes them want to start wr
             
         except Exception as e:
             await ctx.send(f"❌ Error generating test prompt: {str(e)}")
-        finally:
-            db_session.close()
             
     except Exception as e:
-        logger.error(f"Error in test_prompt command: {str(e)}")
+        logger.error("Error in test_prompt command: %s", e)
         await ctx.send("❌ An error occurred while testing the prompt generation.")
 
+@bot.command(name="cacheStats", help="(Admin only) View response and sentiment cache hit rates")
+@admin_only
+async def cache_stats(ctx):
+    """Show hit/miss counters for the agent response cache and the sentiment cache"""
+    lines = ["📈 **Cache Stats**"]
+    caches = (
+        ("Agent responses", _response_cache().stats()),
+        ("Journal sentiment", _journal_analyzer().sentiment_batcher.stats())
+    )
+    for name, stats in caches:
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = stats["hits"] / lookups if lookups else 0.0
+        lines.append(
+            f"• {name}: {stats['hits']} hits / {stats['misses']} misses "
+            f"({hit_rate:.0%}), {stats['size']} cached"
+        )
+    await ctx.send("\n".join(lines))
+
 @bot.command(name="growthForecast", help="Generate a personalized growth forecast based on your journal entries")
 async def growth_forecast(ctx, days: int = 90):
     """
@@ -1084,15 +1606,16 @@ async def growth_forecast(ctx, days: int = 90):
     Args:
         days: Number of past days to analyze (default: 90)
     """
+    user_id = str(ctx.author.id)
     try:
         # Send initial message
-        await ctx.send("🔮 Analyzing your journal entries to generate a growth forecast... This may take a moment.")
+        processing_msg = await ctx.send("🔮 Analyzing your journal entries to generate a growth forecast... This may take a moment.")
         
         # Generate forecast
-        result = await journal_analyzer.generate_growth_forecast(str(ctx.author.id), days)
+        result = await _with_llm_slot(ctx, lambda: _journal_analyzer().generate_growth_forecast(user_id, days))
         
         if not result["success"]:
-            await ctx.send(result["message"])
+            await processing_msg.edit(content=result["message"])
             return
         
         # Format metadata for display
@@ -1119,263 +1642,357 @@ async def growth_forecast(ctx, days: int = 90):
             header += "**Key Areas of Focus:**\n"
             header += "• " + "\n• ".join(metadata['identified_themes']) + "\n\n"
         
-        await ctx.send(header)
+        # The header replaces the processing message when it fits; forecast and tips
+        # are packed into as few further messages as possible
+        sender = _MessageBuffer(ctx)
+        if len(header) <= MESSAGE_CHUNK_SIZE:
+            await processing_msg.edit(content=header)
+        else:
+            await sender.add(header)
         
-        # Split forecast into chunks and send
-        forecast_chunks = [result["forecast"][i:i+1900] for i in range(0, len(result["forecast"]), 1900)]
-        for chunk in forecast_chunks:
-            if chunk.strip():  # Only send non-empty chunks
-                await ctx.send(chunk)
+        # Pack the forecast on paragraph/line/word boundaries
+        for chunk in _pack(result["forecast"]):
+            await sender.add(chunk)
+            await sender.add("\n")
         
         # Add footer with tips
-        footer = (
-            "\n💡 **Tips for Using Your Growth Forecast:**\n"
-            "• Review these predictions periodically to track your progress\n"
-            "• Use `!journal` to document your journey toward these milestones\n"
-            "• Try `!reflect` to see how you're progressing on your growth path\n"
-            "• Adjust your focus based on the identified opportunities\n\n"
-            "*Remember: This forecast is a guide based on your patterns, not a fixed destiny. "
-            "You have the power to shape your growth journey!*"
-        )
-        await ctx.send(footer)
+        await sender.add(GROWTH_FORECAST_TIPS)
+        await sender.flush()
         
     except Exception as e:
-        logger.error(f"Error in growth_forecast command: {str(e)}")
+        logger.error("Error in growth_forecast command: %s", e)
         await ctx.send("❌ I encountered an error while generating your growth forecast. Please try again later.")
 
+# Lower bounds of each sentiment band after the first; the negative bounds are exclusive
+# (-0.1 is still "somewhat negative"), hence the nudge up to the next float
+SENTIMENT_THRESHOLDS = (math.nextafter(-0.5, math.inf), math.nextafter(-0.1, math.inf), 0.1, 0.5)
+SENTIMENT_LABELS = ("very negative", "somewhat negative", "neutral", "somewhat positive", "very positive")
+
 def _get_sentiment_description(score: float) -> str:
     """Get a description of the sentiment score"""
-    if score >= 0.5:
-        return "very positive"
-    elif score >= 0.1:
-        return "somewhat positive"
-    elif score > -0.1:
-        return "neutral"
-    elif score > -0.5:
-        return "somewhat negative"
-    else:
-        return "very negative"
+    return SENTIMENT_LABELS[bisect.bisect_right(SENTIMENT_THRESHOLDS, score)]
+
+EMOTION_INSIGHTS = {
+    "joy": "you've experienced moments of happiness and satisfaction",
+    "trust": "you've developed confidence and faith in your experiences",
+    "fear": "you've faced some challenging or uncertain situations",
+    "surprise": "you've encountered unexpected moments or revelations",
+    "sadness": "you've processed some difficult emotions or experiences",
+    "disgust": "you've encountered some frustrating or unpleasant situations",
+    "anger": "you've dealt with some frustrating or unjust situations",
+    "anticipation": "you've looked forward to future events or changes"
+}
+
+TREND_INSIGHTS = {
+    "improving": "suggesting positive growth and development in your emotional well-being",
+    "declining": "indicating you might benefit from some self-care and reflection",
+    "stable": "showing consistency in your emotional state",
+    "fluctuating": "showing natural variations in your emotional journey"
+}
 
 def _get_emotion_insight(emotion: str) -> str:
     """Get insight about an emotion"""
-    insights = {
-        "joy": "you've experienced moments of happiness and satisfaction",
-        "trust": "you've developed confidence and faith in your experiences",
-        "fear": "you've faced some challenging or uncertain situations",
-        "surprise": "you've encountered unexpected moments or revelations",
-        "sadness": "you've processed some difficult emotions or experiences",
-        "disgust": "you've encountered some frustrating or unpleasant situations",
-        "anger": "you've dealt with some frustrating or unjust situations",
-        "anticipation": "you've looked forward to future events or changes"
-    }
-    return insights.get(emotion.lower(), "you've experienced various emotional states")
+    return EMOTION_INSIGHTS.get(emotion.lower(), "you've experienced various emotional states")
 
 def _get_trend_insight(trend: str) -> str:
     """Get insight about an emotional trend"""
-    insights = {
-        "improving": "suggesting positive growth and development in your emotional well-being",
-        "declining": "indicating you might benefit from some self-care and reflection",
-        "stable": "showing consistency in your emotional state",
-        "fluctuating": "showing natural variations in your emotional journey"
+    return TREND_INSIGHTS.get(trend.lower(), "showing the natural ebb and flow of emotions")
+
+# Reply templates for a missing argument; usage examples are looked up by command name
+MISSING_ARGUMENT_TEMPLATE = (
+    "⚠️ Missing required argument: `{param}`\n\n"
+    "**Command:** `!{cmd}`\n"
+    "**Description:** {help}\n\n"
+    "{usage}"
+)
+DEFAULT_USAGE_TEMPLATE = (
+    "**Usage:**\n"
+    "`!{cmd} <{param}>`\n"
+    "Type `!menu` for a full list of commands and their usage."
+)
+MISSING_ARGUMENT_EXAMPLES = {
+    "journal": (
+        "**Example Usage:**\n"
+        "`!journal Today was a great day! I accomplished...`\n"
+        "Make sure to include your journal entry text after the command."
+    ),
+    "futureMessage": (
+        "**Example Usage:**\n"
+        "`!futureMessage Dear future self, remember to...`\n"
+        "Make sure to include your message text after the command."
+    ),
+    "feedback": (
+        "**Example Usage:**\n"
+        "`!feedback 5 I really enjoyed using this bot because...`\n\n"
+        "**Format:**\n"
+        "`!feedback <rating> <message>`\n"
+        "• Rating must be a number from 1 to 5\n"
+        "• Message is your feedback text"
+    )
+}
+
+FEEDBACK_RATING_HELP = (
+    "⚠️ **Invalid Rating Format**\n\n"
+    "The feedback command requires a rating number (1-5) followed by your feedback message.\n\n"
+    "**Correct Format:**\n"
+    "`!feedback <rating> <message>`\n"
+    "• Rating must be a number from 1 to 5\n"
+    "• Message is your feedback text\n\n"
+    "**Examples:**\n"
+    "✅ `!feedback 5 This bot is amazing!`\n"
+    "✅ `!feedback 3 It's good but could be better`\n"
+    "❌ `!feedback Great job!` (missing rating)\n"
+    "❌ `!feedback awesome 5` (rating should come first)\n\n"
+    "Please try again with a rating number (1-5) followed by your message."
+)
+
+BAD_ARGUMENT_TEMPLATE = (
+    "⚠️ Invalid argument type provided.\n\n"
+    "**Error:** {error}\n\n"
+    "Make sure you're providing the correct type of argument:\n"
+    "• Numbers should be whole numbers (e.g., `30` not `30.5`)\n"
+    "• Text should be provided after the command\n"
+    "• For ratings, use numbers 1-5\n\n"
+    "Type `!menu` for more information about command usage."
+)
+
+def _command_not_found_response(ctx, error) -> str:
+    """Build the reply for an unknown command"""
+    command_name = ctx.message.content.split()[0][1:]  # Remove the prefix
+    return (
+        f"❓ Command `{command_name}` not found.\n\n"
+        "💡 **Need help?**\n"
+        "• Use `!menu` to see all available commands\n"
+        "• Check your spelling and try again\n"
+        "• Commands are case-sensitive\n"
+        "• Make sure to include required parameters"
+    )
+
+def _missing_argument_response(ctx, error) -> str:
+    """Build the reply for a command called without a required argument"""
+    fields = {
+        "cmd": ctx.command.name,
+        "param": error.param.name,
+        "help": ctx.command.help or "No description available"
     }
-    return insights.get(trend.lower(), "showing the natural ebb and flow of emotions")
+    
+    # Use the command's specific usage example where we have one
+    usage = MISSING_ARGUMENT_EXAMPLES.get(fields["cmd"]) or DEFAULT_USAGE_TEMPLATE.format(**fields)
+    return MISSING_ARGUMENT_TEMPLATE.format(usage=usage, **fields)
+
+def _bad_argument_response(ctx, error) -> str:
+    """Build the reply for an argument that couldn't be converted"""
+    # Get the command name
+    cmd_name = ctx.command.name if ctx.command else "unknown"
+    
+    # Special handling for feedback command rating errors
+    if cmd_name == "feedback" and "Converting to \"int\" failed for parameter \"rating\"" in str(error):
+        return FEEDBACK_RATING_HELP
+    
+    # Generic bad argument handling for other commands
+    return BAD_ARGUMENT_TEMPLATE.format(error=str(error))
+
+def _not_authorized_response(ctx, error) -> str:
+    """Build the reply for an admin-only command used by someone else"""
+    return "⚠️ This command is only available to system administrators."
+
+def _generic_error_response(ctx, error) -> str:
+    """Log an unexpected command error and build a user-friendly reply"""
+    logger.error("Command error: %s", error)
+    return (
+        "❌ An error occurred while processing your command.\n"
+        "Please check `!menu` for correct command usage or try again later."
+    )
+
+# Reply builders keyed by error type; subclasses fall back to their nearest listed base class
+ERROR_RESPONSES = {
+    commands.CommandNotFound: _command_not_found_response,
+    commands.MissingRequiredArgument: _missing_argument_response,
+    commands.BadArgument: _bad_argument_response,
+    NotAuthorized: _not_authorized_response
+}
 
 @bot.event
 async def on_command_error(ctx, error):
     """Handle command errors"""
-    if isinstance(error, commands.CommandNotFound):
-        command_name = ctx.message.content.split()[0][1:]  # Remove the prefix
-        response = (
-            f"❓ Command `{command_name}` not found.\n\n"
-            "💡 **Need help?**\n"
-            "• Use `!menu` to see all available commands\n"
-            "• Check your spelling and try again\n"
-            "• Commands are case-sensitive\n"
-            "• Make sure to include required parameters"
-        )
-        await ctx.send(response)
-    elif isinstance(error, commands.MissingRequiredArgument):
-        # Get command help text
-        command = ctx.command
-        cmd_name = command.name
-        cmd_help = command.help or "No description available"
-        
-        # Create a helpful error message
-        response = (
-            f"⚠️ Missing required argument: `{error.param.name}`\n\n"
-            f"**Command:** `!{cmd_name}`\n"
-            f"**Description:** {cmd_help}\n\n"
-        )
-        
-        # Add specific usage examples based on the command
-        if cmd_name == "journal":
-            response += (
-                "**Example Usage:**\n"
-                "`!journal Today was a great day! I accomplished...`\n"
-                "Make sure to include your journal entry text after the command."
-            )
-        elif cmd_name == "futureMessage":
-            response += (
-                "**Example Usage:**\n"
-                "`!futureMessage Dear future self, remember to...`\n"
-                "Make sure to include your message text after the command."
-            )
-        elif cmd_name == "feedback":
-            response += (
-                "**Example Usage:**\n"
-                "`!feedback 5 I really enjoyed using this bot because...`\n\n"
-                "**Format:**\n"
-                "`!feedback <rating> <message>`\n"
-                "• Rating must be a number from 1 to 5\n"
-                "• Message is your feedback text"
-            )
-        else:
-            response += (
-                "**Usage:**\n"
-                f"`!{cmd_name} <{error.param.name}>`\n"
-                f"Type `!menu` for a full list of commands and their usage."
-            )
-        
-        await ctx.send(response)
-    elif isinstance(error, commands.BadArgument):
-        # Get the command name
-        cmd_name = ctx.command.name if ctx.command else "unknown"
-        
-        # Special handling for feedback command rating errors
-        if cmd_name == "feedback" and "Converting to \"int\" failed for parameter \"rating\"" in str(error):
-            response = (
-                "⚠️ **Invalid Rating Format**\n\n"
-                "The feedback command requires a rating number (1-5) followed by your feedback message.\n\n"
-                "**Correct Format:**\n"
-                "`!feedback <rating> <message>`\n"
-                "• Rating must be a number from 1 to 5\n"
-                "• Message is your feedback text\n\n"
-                "**Examples:**\n"
-                "✅ `!feedback 5 This bot is amazing!`\n"
-                "✅ `!feedback 3 It's good but could be better`\n"
-                "❌ `!feedback Great job!` (missing rating)\n"
-                "❌ `!feedback awesome 5` (rating should come first)\n\n"
-                "Please try again with a rating number (1-5) followed by your message."
-            )
-        else:
-            # Generic bad argument handling for other commands
-            response = (
-                "⚠️ Invalid argument type provided.\n\n"
-                f"**Error:** {str(error)}\n\n"
-                "Make sure you're providing the correct type of argument:\n"
-                "• Numbers should be whole numbers (e.g., `30` not `30.5`)\n"
-                "• Text should be provided after the command\n"
-                "• For ratings, use numbers 1-5\n\n"
-                "Type `!menu` for more information about command usage."
-            )
-        await ctx.send(response)
-    else:
-        # Log other errors and send a user-friendly message
-        logger.error(f"Command error: {str(error)}")
-        await ctx.send(
-            "❌ An error occurred while processing your command.\n"
-            "Please check `!menu` for correct command usage or try again later."
-        )
+    # Walk the MRO so e.g. BadArgument subclasses still get the BadArgument reply
+    build_response = next(
+        (ERROR_RESPONSES[cls] for cls in type(error).__mro__ if cls in ERROR_RESPONSES),
+        _generic_error_response
+    )
+    await _sender_for(ctx.channel).send(build_response(ctx, error))
+
+# Journaling prompts for inactive users are written several at a time, one LLM call per batch
+REMINDER_BATCH_SIZE = 10
+
+# Reminder DMs sent at once, well under Discord's global rate limit
+REMINDER_DM_CONCURRENCY = 8
+
+# Instructions for writing reminder prompts; only the users' trend lines are filled in per call
+REMINDER_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are an empathetic journaling assistant. Respond only with the exact JSON format requested."
+}
+REMINDER_PROMPT_TEMPLATE = """Generate a personalized journaling prompt for each of these users, who haven't written in their journal for more than 7 days.
+
+Users' recent emotional trends:
+{users}
+
+For each user, create an engaging, thoughtful prompt that:
+1. Acknowledges their absence without being judgmental
+2. Relates to their emotional patterns
+3. Encourages self-reflection
+4. Is specific enough to spark ideas but open-ended enough for personal expression
+
+Write each prompt as a warm, inviting message that makes them want to start writing again.
+Respond ONLY with a JSON array of {count} strings, one prompt per user in the order listed."""
+REMINDER_DM_TEMPLATE = (
+    "📝 **Time for a Journal Entry!**\n\n"
+    "Hey {username}! I noticed it's been a while since your last journal entry. "
+    "I've created a special prompt just for you:\n\n"
+    "{prompt}\n\n"
+    "Ready to write? Just use the `!journal` command in our chat to share your thoughts!\n"
+    "💭 *Your journal is a safe space for self-reflection and growth.*"
+)
+
+# Inactive users are checked once a day at this time, so restarts don't trigger an extra round of DMs
+REMINDER_TIME = time(hour=17, tzinfo=UTC)
+
+async def _reminder_prompts(trends: list) -> list:
+    """
+    Write personalized journaling prompts for several inactive users with a single LLM call
+
+    Args:
+        trends: Each user's emotional trends, as returned by get_emotional_trends
+
+    Returns:
+        One prompt per user, in the same order
+
+    Raises:
+        ValueError: If the reply isn't a JSON array with one prompt per user
+    """
+    users = "\n".join(
+        f"{i}. Dominant emotions: {' → '.join(filter(None, user_trends.get('dominant_emotions', []))) or 'No data'}"
+        for i, user_trends in enumerate(trends, 1)
+    )
+    # Callers hold an llm_slots slot around this call
+    prompt_response = await _agent().client.chat.complete_async(
+        model="mistral-large-latest",
+        messages=[
+            REMINDER_SYSTEM_MESSAGE,
+            {"role": "user", "content": REMINDER_PROMPT_TEMPLATE.format(users=users, count=len(trends))}
+        ]
+    )
+
+    # Remove any markdown code block formatting before parsing
+    response_text = re.sub(r'^```(?:json)?\s*|\s*```$', '', prompt_response.choices[0].message.content.strip())
+    prompts = json.loads(response_text)
+    if not isinstance(prompts, list) or len(prompts) != len(trends):
+        raise ValueError(f"Expected {len(trends)} prompts, got: {response_text[:200]}")
+    return [str(prompt).strip() for prompt in prompts]
+
+async def _send_reminder(user_id: str, username: str, personalized_prompt: str, dm_slots: asyncio.Semaphore):
+    """
+    DM a journaling prompt to an inactive user, logging rather than raising on failure
+
+    Args:
+        user_id: The user's Discord ID
+        username: The user's name, for the greeting
+        personalized_prompt: The prompt written for this user
+        dm_slots: Semaphore bounding concurrent DMs
+    """
+    message = REMINDER_DM_TEMPLATE.format(username=username, prompt=personalized_prompt)
+    
+    # Try to send DM to user
+    try:
+        async with dm_slots:
+            # The user cache covers anyone seen since startup; only the rest cost an API call
+            user = bot.get_user(int(user_id)) or await bot.fetch_user(int(user_id))
+            await user.send(message)
+        logger.info("Sent journaling prompt to user %s (%s)", username, user_id)
+    
+    except discord.Forbidden:
+        logger.warning("Could not send DM to user %s (%s)", username, user_id)
+    except discord.HTTPException as e:
+        logger.error("Error sending DM to user %s (%s): %s", username, user_id, e)
+    except Exception as e:
+        logger.error("Error processing prompt for user %s (%s): %s", username, user_id, e)
+
+async def _remind_batch(batch: list, dm_slots: asyncio.Semaphore):
+    """
+    Write prompts for a batch of inactive users with one LLM call, then DM them all
+
+    Args:
+        batch: (user_id, username) pairs, at most REMINDER_BATCH_SIZE of them
+        dm_slots: Semaphore bounding concurrent DMs
+    """
+    try:
+        # Get each user's emotional history for context, then write all their prompts at once
+        trends = [await _journal_analyzer().get_emotional_trends(user_id, days=30) for user_id, _ in batch]
+        # Background prompts take a slot too, but without a waiting notice
+        async with llm_slots:
+            personalized_prompts = await _reminder_prompts(trends)
+    except Exception as e:
+        logger.error("Error generating prompts for %d inactive users: %s", len(batch), e)
+        return
+    
+    await asyncio.gather(*(
+        _send_reminder(user_id, username, personalized_prompt, dm_slots)
+        for (user_id, username), personalized_prompt in zip(batch, personalized_prompts)
+    ))
 
 # Scheduled task to check for inactive users and send prompts
-@tasks.loop(hours=24)  # Run once every 24 hours
+@tasks.loop(time=REMINDER_TIME)  # Run once a day at a fixed time
 async def check_inactive_users():
     """
     Check for users who haven't logged an entry in 7 days and send them a personalized prompt.
     This task runs daily and:
     1. Queries the database for inactive users
-    2. Generates personalized prompts using Mistral
+    2. Generates personalized prompts using Mistral, REMINDER_BATCH_SIZE users per call
     3. Sends prompts via DM to each inactive user
     """
     logger.info("Running scheduled check for inactive users...")
-    db_session = Session()
     
     try:
+        await _ensure_components()
         # Calculate the cutoff date (7 days ago)
         cutoff_date = datetime.now(UTC) - timedelta(days=7)
         
-        # Get all users who have ever journaled
-        all_users = db_session.query(ChatLog.user_id, ChatLog.username).distinct().all()
-        
-        # For each user, check their last entry
-        for user_id, username in all_users:
-            latest_entry = (
-                db_session.query(ChatLog)
-                .filter(ChatLog.user_id == user_id)
-                .order_by(ChatLog.timestamp.desc())
-                .first()
+        # Users whose latest entry is older than the cutoff. The grouped scan reads only the
+        # (user_id, timestamp) index; the table is touched once per inactive user, for the
+        # username on their latest entry
+        with Session() as db_session:
+            last_entries = (
+                db_session.query(ChatLog.user_id, func.max(ChatLog.timestamp).label("last_timestamp"))
+                .group_by(ChatLog.user_id)
+                .having(func.max(ChatLog.timestamp) < cutoff_date)
+                .subquery()
             )
-            
-            # If user hasn't journaled in 7 days
-            # Ensure timestamp is timezone-aware before comparison
-            if latest_entry:
-                entry_timestamp = latest_entry.timestamp
-                if entry_timestamp.tzinfo is None:
-                    # If timestamp is naive, make it timezone-aware
-                    entry_timestamp = entry_timestamp.replace(tzinfo=UTC)
-                
-                if entry_timestamp < cutoff_date:
-                    try:
-                        # Get user's emotional history for context
-                        user_history = await journal_analyzer.get_emotional_trends(user_id, days=30)
-                        
-                        # Create a prompt based on user's history
-                        prompt_context = f"""Generate a personalized journaling prompt for a user who hasn't written in their journal for a while.
-
-User's recent emotional trends:
-- Dominant emotions: {' → '.join(user_history.get('dominant_emotions', ['No data']))}
-- Last entry was more than 7 days ago
-
-Create an engaging, thoughtful prompt that:
-1. Acknowledges their absence without being judgmental
-2. Relates to their emotional patterns
-3. Encourages self-reflection
-4. Is specific enough to spark ideas but open-ended enough for personal expression
-
-Format the response as a warm, inviting message that makes them want to start writing again."""
-
-                        # Generate personalized prompt using Mistral
-                        prompt_response = await agent.client.chat.complete_async(
-                            model="mistral-large-latest",
-                            messages=[
-                                {"role": "system", "content": "You are an empathetic journaling assistant."},
-                                {"role": "user", "content": prompt_context}
-                            ]
-                        )
-                        
-                        personalized_prompt = prompt_response.choices[0].message.content.strip()
-                        
-                        # Try to send DM to user
-                        try:
-                            # Get the Discord user object
-                            user = await bot.fetch_user(int(user_id))
-                            
-                            # Create and send the message
-                            message = (
-                                "📝 **Time for a Journal Entry!**\n\n"
-                                f"Hey {username}! I noticed it's been a while since your last journal entry. "
-                                "I've created a special prompt just for you:\n\n"
-                                f"{personalized_prompt}\n\n"
-                                "Ready to write? Just use the `!journal` command in our chat to share your thoughts!\n"
-                                "💭 *Your journal is a safe space for self-reflection and growth.*"
-                            )
-                            
-                            await user.send(message)
-                            logger.info(f"Sent journaling prompt to user {username} ({user_id})")
-                            
-                        except discord.Forbidden:
-                            logger.warning(f"Could not send DM to user {username} ({user_id})")
-                        except discord.HTTPException as e:
-                            logger.error(f"Error sending DM to user {username} ({user_id}): {str(e)}")
-                    
-                    except Exception as e:
-                        logger.error(f"Error processing prompt for user {username} ({user_id}): {str(e)}")
+            inactive_users = (
+                db_session.query(ChatLog.user_id, func.max(ChatLog.username))
+                .join(last_entries, and_(
+                    ChatLog.user_id == last_entries.c.user_id,
+                    ChatLog.timestamp == last_entries.c.last_timestamp
+                ))
+                .group_by(ChatLog.user_id)
+                .all()
+            )
+        
+        # Batches write their prompts concurrently (llm_slots still caps the LLM calls) and
+        # DMs go out in parallel, at most REMINDER_DM_CONCURRENCY at a time
+        dm_slots = asyncio.Semaphore(REMINDER_DM_CONCURRENCY)
+        await asyncio.gather(*(
+            _remind_batch(inactive_users[start:start + REMINDER_BATCH_SIZE], dm_slots)
+            for start in range(0, len(inactive_users), REMINDER_BATCH_SIZE)
+        ))
     
     except Exception as e:
-        logger.error(f"Error in check_inactive_users task: {str(e)}")
-    
-    finally:
-        db_session.close()
+        logger.error("Error in check_inactive_users task: %s", e)
+
+@bot.before_invoke
+async def before_command(ctx):
+    """Hold commands until the components are loaded, so none of them builds a model on the event loop"""
+    await _ensure_components()
 
 @check_inactive_users.before_loop
 async def before_check_inactive_users():
@@ -1385,8 +2002,9 @@ async def before_check_inactive_users():
 @bot.command(name="profile", help="View your journaling profile and achievements")
 async def profile(ctx):
     """Display user's profile with stats and achievements"""
+    user_id = str(ctx.author.id)
     try:
-        profile_data = await gamification_manager.get_profile_data(str(ctx.author.id))
+        profile_data = await _gamification_manager().get_profile_data(user_id)
         if not profile_data:
             await ctx.send("You haven't started journaling yet! Write your first entry to begin your journey.")
             return
@@ -1432,7 +2050,7 @@ async def profile(ctx):
         await ctx.send(embed=embed)
         
     except Exception as e:
-        logger.error(f"Error displaying profile: {str(e)}")
+        logger.error("Error displaying profile: %s", e)
         await ctx.send("Sorry, there was an error displaying your profile. Please try again later.")
 
 @bot.command(name="leaderboard", help="View the journaling leaderboard")
@@ -1455,7 +2073,7 @@ async def leaderboard(ctx, category: str = "total_entries"):
             return
         
         # Get leaderboard data
-        data = await gamification_manager.get_leaderboard(
+        data = await _gamification_manager().get_leaderboard(
             category=valid_categories[category],
             limit=10
         )
@@ -1480,27 +2098,28 @@ async def leaderboard(ctx, category: str = "total_entries"):
         
         # Format leaderboard entries
         medals = ["🥇", "🥈", "🥉"]
-        leaderboard_text = ""
+        leaderboard_lines = []
         
         for i, entry in enumerate(data):
             medal = medals[i] if i < 3 else "▫️"
-            leaderboard_text += f"{medal} **{entry['username']}**: {entry['value']} {entry['label']}\n"
+            leaderboard_lines.append(f"{medal} **{entry['username']}**: {entry['value']} {entry['label']}\n")
         
-        embed.description = leaderboard_text
+        embed.description = "".join(leaderboard_lines)
         embed.set_footer(text=f"Use !leaderboard <category> to view other categories")
         
         await ctx.send(embed=embed)
         
     except Exception as e:
-        logger.error(f"Error displaying leaderboard: {str(e)}")
+        logger.error("Error displaying leaderboard: %s", e)
         await ctx.send("Sorry, there was an error displaying the leaderboard. Please try again later.")
 
 @bot.command(name="createCapsule", help="Create a new themed memory capsule (e.g., '!createCapsule Travel Memories My travel experiences')")
 async def create_capsule(ctx, name: str, *, description: str = None):
     """Create a new themed memory capsule"""
+    user_id = str(ctx.author.id)
     try:
-        result = await memory_capsule_manager.create_capsule(
-            str(ctx.author.id),
+        result = await _memory_capsule_manager().create_capsule(
+            user_id,
             name,
             description
         )
@@ -1518,32 +2137,34 @@ async def create_capsule(ctx, name: str, *, description: str = None):
         await ctx.send(response)
         
     except Exception as e:
-        logger.error(f"Error creating capsule: {str(e)}")
+        logger.error("Error creating capsule: %s", e)
         await ctx.send("❌ An error occurred while creating your memory capsule.")
 
 @bot.command(name="addToCapsule", help="Add a journal entry to a memory capsule (e.g., '!addToCapsule 1 3' to add entry #3 to capsule #1)")
 async def add_to_capsule(ctx, capsule_id: int, entry_number: int):
     """Add a journal entry to a memory capsule"""
+    user_id = str(ctx.author.id)
     try:
-        # Get the specified entry
-        db_session = Session()
-        entries = (
-            db_session.query(ChatLog)
-            .filter(ChatLog.user_id == str(ctx.author.id))
-            .order_by(ChatLog.timestamp.desc())
-            .all()
-        )
-        
-        if not entries or entry_number > len(entries) or entry_number < 1:
-            await ctx.send(f"❌ Entry #{entry_number} not found. You have {len(entries)} entries.")
-            return
-        
         # Get the chat log ID for the specified entry
-        chat_log_id = entries[entry_number - 1].id
+        async with AsyncSession() as db_session:
+            chat_log_id = await db_session.scalar(
+                select(ChatLog.id)
+                .filter(ChatLog.user_id == user_id)
+                .order_by(ChatLog.timestamp.desc())
+                .offset(entry_number - 1)
+                .limit(1)
+            ) if entry_number >= 1 else None
+            
+            if chat_log_id is None:
+                total = await db_session.scalar(
+                    select(func.count(ChatLog.id)).filter(ChatLog.user_id == user_id)
+                )
+                await ctx.send(f"❌ Entry #{entry_number} not found. You have {total} entries.")
+                return
         
         # Add entry to capsule
-        result = await memory_capsule_manager.add_entry(
-            str(ctx.author.id),
+        result = await _memory_capsule_manager().add_entry(
+            user_id,
             capsule_id,
             chat_log_id
         )
@@ -1551,19 +2172,18 @@ async def add_to_capsule(ctx, capsule_id: int, entry_number: int):
         await ctx.send(f"{'✨' if result['success'] else '❌'} {result['message']}")
         
     except Exception as e:
-        logger.error(f"Error adding to capsule: {str(e)}")
+        logger.error("Error adding to capsule: %s", e)
         await ctx.send("❌ An error occurred while adding the entry to your capsule.")
-    finally:
-        db_session.close()
 
 @bot.command(name="viewCapsule", help="View the contents and narrative of a memory capsule (e.g., '!viewCapsule 1')")
 async def view_capsule(ctx, capsule_id: int):
     """View a memory capsule's contents and narrative"""
+    user_id = str(ctx.author.id)
     try:
-        result = await memory_capsule_manager.get_capsule_contents(
-            str(ctx.author.id),
+        result = await _with_llm_slot(ctx, lambda: _memory_capsule_manager().get_capsule_contents(
+            user_id,
             capsule_id
-        )
+        ))
         
         if not result["success"]:
             await ctx.send(f"❌ {result['message']}")
@@ -1573,41 +2193,41 @@ async def view_capsule(ctx, capsule_id: int):
         header = (
             f"📔 **{result['capsule']['name']}**\n"
             f"*{result['capsule']['description'] or 'No description provided'}*\n"
-            f"Created: {result['capsule']['created_at'][:10]}\n"
+            f"Created: {result['capsule']['created_at']:%Y-%m-%d}\n"
             f"Entries: {result['capsule']['entry_count']}\n\n"
         )
         await ctx.send(header)
         
         # Send entries in chronological order
         if result["entries"]:
-            entries_msg = "**📝 Entries:**\n"
+            entry_parts = ["**📝 Entries:**\n"]
             for entry in result["entries"]:
-                date = entry["timestamp"][:10]
+                date = f"{entry['timestamp']:%Y-%m-%d}"
                 preview = entry["content"][:100] + "..." if len(entry["content"]) > 100 else entry["content"]
-                entries_msg += f"\n• {date}: {preview}"
+                entry_parts.append(f"\n• {date}: {preview}")
+            entries_msg = "".join(entry_parts)
             
             # Split entries into chunks if needed
-            chunks = [entries_msg[i:i+1900] for i in range(0, len(entries_msg), 1900)]
-            for chunk in chunks:
+            for chunk in _pack(entries_msg):
                 await ctx.send(chunk)
         
         # Send narrative summary
         await ctx.send("\n**📖 Narrative Summary:**\n")
         
         # Split narrative into chunks
-        narrative_chunks = [result["narrative"][i:i+1900] for i in range(0, len(result["narrative"]), 1900)]
-        for chunk in narrative_chunks:
+        for chunk in _pack(result["narrative"]):
             await ctx.send(chunk)
         
     except Exception as e:
-        logger.error(f"Error viewing capsule: {str(e)}")
+        logger.error("Error viewing capsule: %s", e)
         await ctx.send("❌ An error occurred while retrieving your memory capsule.")
 
 @bot.command(name="listCapsules", help="List all your memory capsules")
 async def list_capsules(ctx):
     """List all memory capsules for the user"""
+    user_id = str(ctx.author.id)
     try:
-        result = await memory_capsule_manager.list_capsules(str(ctx.author.id))
+        result = await _memory_capsule_manager().list_capsules(user_id)
         
         if not result["success"]:
             await ctx.send(f"❌ {result['message']}")
@@ -1618,36 +2238,42 @@ async def list_capsules(ctx):
             return
         
         # Format capsules list
-        response = "📚 **Your Memory Capsules**\n\n"
+        response_parts = ["📚 **Your Memory Capsules**\n\n"]
         
         for capsule in result["capsules"]:
-            response += (
+            response_parts.append(
                 f"**{capsule['name']}** (ID: {capsule['id']})\n"
                 f"• Description: {capsule['description'] or 'No description'}\n"
-                f"• Created: {capsule['created_at'][:10]}\n"
+                f"• Created: {capsule['created_at']:%Y-%m-%d}\n"
                 f"• Entries: {capsule['entry_count']}\n\n"
             )
         
-        await ctx.send(response)
+        await ctx.send("".join(response_parts))
         
     except Exception as e:
-        logger.error(f"Error listing capsules: {str(e)}")
+        logger.error("Error listing capsules: %s", e)
         await ctx.send("❌ An error occurred while retrieving your capsules.")
 
 @bot.command(name="deleteCapsule", help="Delete a memory capsule (e.g., '!deleteCapsule 1')")
 async def delete_capsule(ctx, capsule_id: int):
     """Delete a memory capsule"""
+    user_id = str(ctx.author.id)
     try:
-        result = await memory_capsule_manager.delete_capsule(
-            str(ctx.author.id),
+        result = await _memory_capsule_manager().delete_capsule(
+            user_id,
             capsule_id
         )
         
         await ctx.send(f"{'✨' if result['success'] else '❌'} {result['message']}")
         
     except Exception as e:
-        logger.error(f"Error deleting capsule: {str(e)}")
+        logger.error("Error deleting capsule: %s", e)
         await ctx.send("❌ An error occurred while deleting your capsule.")
 
+# Run on uvloop's libuv-based event loop where available (bot.run creates the loop from this policy)
+if uvloop is not None:
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
 # Start the bot, connecting it to the gateway
-bot.run(token)
+# log_handler=None keeps discord.py from adding its own (blocking) handler next to the queued one
+bot.run(token, log_handler=None)
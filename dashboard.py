@@ -5,20 +5,23 @@ import pandas as pd
 from typing import Dict, List, Any
 from sqlalchemy.orm import Session
 from models import ChatLog, MessageSentiment
-import os
 import logging
+import threading
 
 logger = logging.getLogger("discord")
 
+# Rendered charts kept in memory, so a repeated !dashboard over unchanged entries skips rendering
+CHART_CACHE_SIZE = 32
+
 class Dashboard:
     def __init__(self, session_maker):
         """Initialize the dashboard with database session maker"""
         self.Session = session_maker
         
-        # Create a directory for storing temporary chart images
-        self.chart_dir = "temp_charts"
-        if not os.path.exists(self.chart_dir):
-            os.makedirs(self.chart_dir)
+        # LRU of rendered PNG bytes keyed by the user, window and the entries drawn (dicts preserve order);
+        # generate_mood_trends runs in worker threads, so the cache is only touched under the lock
+        self._chart_cache = {}
+        self._chart_cache_lock = threading.Lock()
 
     def _get_user_data(self, user_id: str, days: int = 30) -> pd.DataFrame:
         """
@@ -81,7 +84,7 @@ class Dashboard:
             days: Number of past days to analyze
             
         Returns:
-            Dictionary containing chart file paths and statistics
+            Dictionary containing the PNG chart bytes and statistics
         """
         try:
             # Get user data
@@ -93,79 +96,19 @@ class Dashboard:
                     "message": "No journal entries found for the specified time period."
                 }
             
-            # Create subplot figure
-            fig = make_subplots(
-                rows=2, cols=1,
-                subplot_titles=(
-                    'Overall Sentiment Over Time',
-                    'Emotional Components Trends'
-                ),
-                vertical_spacing=0.2,
-                specs=[[{"type": "scatter"}], [{"type": "scatter"}]]
-            )
-            
-            # Add overall sentiment trend
-            fig.add_trace(
-                go.Scatter(
-                    x=df['timestamp'],
-                    y=df['compound_score'],
-                    mode='lines+markers',
-                    name='Overall Sentiment',
-                    line=dict(color='#2E86C1'),
-                    hovertemplate=(
-                        '<b>Date:</b> %{x|%Y-%m-%d %H:%M}<br>'
-                        '<b>Sentiment:</b> %{y:.2f}<br>'
-                        '<extra></extra>'
-                    )
-                ),
-                row=1, col=1
-            )
-            
-            # Add emotional components
             emotions = ['joy', 'trust', 'fear', 'surprise', 'sadness', 'disgust', 'anger', 'anticipation']
-            colors = ['#F4D03F', '#58D68D', '#EC7063', '#BB8FCE', '#5DADE2', '#F5B041', '#E74C3C', '#45B39D']
-            
-            for emotion, color in zip(emotions, colors):
-                fig.add_trace(
-                    go.Scatter(
-                        x=df['timestamp'],
-                        y=df[emotion],
-                        mode='lines',
-                        name=emotion.title(),
-                        line=dict(color=color),
-                        hovertemplate=(
-                            f'<b>{emotion.title()}:</b> %{{y:.2f}}<br>'
-                            '<b>Date:</b> %{x|%Y-%m-%d %H:%M}<br>'
-                            '<extra></extra>'
-                        )
-                    ),
-                    row=2, col=1
-                )
             
-            # Update layout
-            fig.update_layout(
-                title_text="Your Emotional Journey",
-                showlegend=True,
-                height=1000,
-                template="plotly_white",
-                hovermode="x unified",
-                legend=dict(
-                    yanchor="top",
-                    y=0.99,
-                    xanchor="left",
-                    x=1.05
-                )
-            )
-            
-            # Update axes
-            fig.update_xaxes(title_text="Date", row=1, col=1)
-            fig.update_xaxes(title_text="Date", row=2, col=1)
-            fig.update_yaxes(title_text="Sentiment Score (-1 to 1)", row=1, col=1)
-            fig.update_yaxes(title_text="Emotion Intensity", row=2, col=1)
-            
-            # Save the figure
-            chart_path = os.path.join(self.chart_dir, f"mood_trends_{user_id}_{int(datetime.now(UTC).timestamp())}.png")
-            fig.write_image(chart_path, scale=2)
+            # The same user, window and entries always render the same chart
+            cache_key = (user_id, days, len(df), df['timestamp'].iloc[0], df['timestamp'].iloc[-1])
+            with self._chart_cache_lock:
+                chart_bytes = self._chart_cache.pop(cache_key, None)
+            if chart_bytes is None:
+                # Rendering happens outside the lock so other users' charts aren't held up
+                chart_bytes = self._render_chart(df, emotions)
+            with self._chart_cache_lock:
+                self._chart_cache[cache_key] = chart_bytes
+                while len(self._chart_cache) > CHART_CACHE_SIZE:
+                    self._chart_cache.pop(next(iter(self._chart_cache)))
             
             # Calculate statistics
             stats = {
@@ -181,7 +124,7 @@ class Dashboard:
             
             return {
                 "success": True,
-                "chart_path": chart_path,
+                "chart_bytes": chart_bytes,
                 "stats": stats
             }
             
@@ -192,22 +135,85 @@ class Dashboard:
                 "message": f"Error generating mood trends: {str(e)}"
             }
 
-    def cleanup_old_charts(self, max_age_hours: int = 24):
+    def _render_chart(self, df: pd.DataFrame, emotions: List[str]) -> bytes:
         """
-        Clean up old chart files
+        Render the mood trend charts to PNG in memory
         
         Args:
-            max_age_hours: Maximum age of files to keep (in hours)
-        """
-        try:
-            cutoff_time = datetime.now(UTC) - timedelta(hours=max_age_hours)
+            df: The user's entries and sentiment scores, oldest first
+            emotions: The emotion columns to plot
             
-            for filename in os.listdir(self.chart_dir):
-                file_path = os.path.join(self.chart_dir, filename)
-                file_modified = datetime.fromtimestamp(os.path.getmtime(file_path))
-                
-                if file_modified < cutoff_time:
-                    os.remove(file_path)
-                    
-        except Exception as e:
-            logger.error(f"Error cleaning up old charts: {str(e)}") 
\ No newline at end of file
+        Returns:
+            The PNG image bytes
+        """
+        # Create subplot figure
+        fig = make_subplots(
+            rows=2, cols=1,
+            subplot_titles=(
+                'Overall Sentiment Over Time',
+                'Emotional Components Trends'
+            ),
+            vertical_spacing=0.2,
+            specs=[[{"type": "scatter"}], [{"type": "scatter"}]]
+        )
+        
+        # Add overall sentiment trend
+        fig.add_trace(
+            go.Scatter(
+                x=df['timestamp'],
+                y=df['compound_score'],
+                mode='lines+markers',
+                name='Overall Sentiment',
+                line=dict(color='#2E86C1'),
+                hovertemplate=(
+                    '<b>Date:</b> %{x|%Y-%m-%d %H:%M}<br>'
+                    '<b>Sentiment:</b> %{y:.2f}<br>'
+                    '<extra></extra>'
+                )
+            ),
+            row=1, col=1
+        )
+        
+        # Add emotional components
+        colors = ['#F4D03F', '#58D68D', '#EC7063', '#BB8FCE', '#5DADE2', '#F5B041', '#E74C3C', '#45B39D']
+        
+        for emotion, color in zip(emotions, colors):
+            fig.add_trace(
+                go.Scatter(
+                    x=df['timestamp'],
+                    y=df[emotion],
+                    mode='lines',
+                    name=emotion.title(),
+                    line=dict(color=color),
+                    hovertemplate=(
+                        f'<b>{emotion.title()}:</b> %{{y:.2f}}<br>'
+                        '<b>Date:</b> %{x|%Y-%m-%d %H:%M}<br>'
+                        '<extra></extra>'
+                    )
+                ),
+                row=2, col=1
+            )
+        
+        # Update layout
+        fig.update_layout(
+            title_text="Your Emotional Journey",
+            showlegend=True,
+            height=1000,
+            template="plotly_white",
+            hovermode="x unified",
+            legend=dict(
+                yanchor="top",
+                y=0.99,
+                xanchor="left",
+                x=1.05
+            )
+        )
+        
+        # Update axes
+        fig.update_xaxes(title_text="Date", row=1, col=1)
+        fig.update_xaxes(title_text="Date", row=2, col=1)
+        fig.update_yaxes(title_text="Sentiment Score (-1 to 1)", row=1, col=1)
+        fig.update_yaxes(title_text="Emotion Intensity", row=2, col=1)
+        
+        # Render straight to bytes; nothing touches the disk
+        return fig.to_image(format="png", scale=2)
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta, UTC
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, sessionmaker
 from sqlalchemy import func, desc
 from models import UserProfile, Achievement, UserAchievement, ChatLog, MessageSentiment
 import logging
@@ -9,8 +9,10 @@ logger = logging.getLogger(__name__)
 class GamificationManager:
     """Manage user achievements, profiles, and gamification features"""
     
-    def __init__(self, session: Session):
-        self.session = session
+    def __init__(self, session_factory: sessionmaker):
+        # Each call opens its own short-lived session, so pooled connections are
+        # returned between commands instead of one session holding a connection for good
+        self.session_factory = session_factory
         self._init_achievements()
 
     def _init_achievements(self):
@@ -89,22 +91,23 @@ class GamificationManager:
             }
         ]
         
-        # Add achievements if they don't exist
-        for achievement in default_achievements:
-            existing = self.session.query(Achievement).filter_by(name=achievement['name']).first()
-            if not existing:
-                new_achievement = Achievement(**achievement)
-                self.session.add(new_achievement)
+        with self.session_factory() as session:
+            # Add achievements if they don't exist
+            for achievement in default_achievements:
+                existing = session.query(Achievement).filter_by(name=achievement['name']).first()
+                if not existing:
+                    new_achievement = Achievement(**achievement)
+                    session.add(new_achievement)
         
-        try:
-            self.session.commit()
-        except Exception as e:
-            logger.error(f"Error initializing achievements: {str(e)}")
-            self.session.rollback()
+            try:
+                session.commit()
+            except Exception as e:
+                logger.error(f"Error initializing achievements: {str(e)}")
+                session.rollback()
 
-    async def get_or_create_profile(self, user_id: str, username: str) -> UserProfile:
-        """Get existing user profile or create a new one"""
-        profile = self.session.query(UserProfile).filter_by(user_id=user_id).first()
+    async def get_or_create_profile(self, session: Session, user_id: str, username: str) -> UserProfile:
+        """Get existing user profile or create a new one in the given session"""
+        profile = session.query(UserProfile).filter_by(user_id=user_id).first()
         
         if not profile:
             profile = UserProfile(
@@ -112,93 +115,102 @@ class GamificationManager:
                 username=username,
                 created_at=datetime.now(UTC)
             )
-            self.session.add(profile)
+            session.add(profile)
             try:
-                self.session.commit()
+                session.commit()
             except Exception as e:
                 logger.error(f"Error creating user profile: {str(e)}")
-                self.session.rollback()
+                session.rollback()
                 raise
         
         return profile
 
     async def update_profile_stats(self, user_id: str, username: str):
         """Update user profile statistics based on their journal entries"""
-        profile = await self.get_or_create_profile(user_id, username)
+        with self.session_factory() as session:
+            profile = await self.get_or_create_profile(session, user_id, username)
         
-        try:
-            # Get total entries and words
-            entries = self.session.query(ChatLog).filter_by(user_id=user_id).all()
-            total_entries = len(entries)
-            total_words = sum(len(entry.message_content.split()) for entry in entries)
+            try:
+                # Get total entries and words (sentiments are loaded in the same query)
+                entries = (
+                    session.query(ChatLog)
+                    .options(joinedload(ChatLog.sentiment))
+                    .filter_by(user_id=user_id)
+                    .all()
+                )
+                total_entries = len(entries)
+                total_words = sum(len(entry.message_content.split()) for entry in entries)
             
-            # Calculate average sentiment
-            sentiments = [entry.sentiment.compound_score for entry in entries if entry.sentiment]
-            avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0.0
+                # Calculate average sentiment
+                sentiments = [entry.sentiment.compound_score for entry in entries if entry.sentiment]
+                avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0.0
             
-            # Calculate streak
-            if entries:
-                dates = sorted([entry.timestamp.date() for entry in entries])
-                current_streak = 1
-                max_streak = 1
+                # Calculate streak
+                if entries:
+                    dates = sorted([entry.timestamp.date() for entry in entries])
+                    current_streak = 1
+                    max_streak = 1
                 
-                for i in range(1, len(dates)):
-                    if (dates[i] - dates[i-1]).days == 1:
-                        current_streak += 1
-                        max_streak = max(max_streak, current_streak)
-                    else:
-                        current_streak = 1
+                    for i in range(1, len(dates)):
+                        if (dates[i] - dates[i-1]).days == 1:
+                            current_streak += 1
+                            max_streak = max(max_streak, current_streak)
+                        else:
+                            current_streak = 1
                 
-                # Check if streak is still active
-                if (datetime.now(UTC).date() - dates[-1]).days > 1:
+                    # Check if streak is still active
+                    if (datetime.now(UTC).date() - dates[-1]).days > 1:
+                        current_streak = 0
+                else:
                     current_streak = 0
-            else:
-                current_streak = 0
-                max_streak = 0
+                    max_streak = 0
             
-            # Update profile
-            profile.total_entries = total_entries
-            profile.total_words = total_words
-            profile.avg_sentiment = avg_sentiment
-            profile.streak_days = current_streak
-            profile.longest_streak = max(max_streak, profile.longest_streak)
-            profile.last_entry_date = entries[-1].timestamp if entries else None
+                # Update profile
+                profile.total_entries = total_entries
+                profile.total_words = total_words
+                profile.avg_sentiment = avg_sentiment
+                profile.streak_days = current_streak
+                profile.longest_streak = max(max_streak, profile.longest_streak)
+                profile.last_entry_date = entries[-1].timestamp if entries else None
             
-            # Calculate reflection score based on entry quality metrics
-            if entries:
-                latest_entry = entries[-1]
-                words = len(latest_entry.message_content.split())
-                sentiment_range = max(sentiments) - min(sentiments) if sentiments else 0
+                # Calculate reflection score based on entry quality metrics
+                if entries:
+                    latest_entry = entries[-1]
+                    words = len(latest_entry.message_content.split())
+                    sentiment_range = max(sentiments) - min(sentiments) if sentiments else 0
                 
-                # Score based on length, emotional range, and sentiment intensity
-                reflection_score = min(100, (
-                    (words / 200) * 40 +  # Length component (40%)
-                    (sentiment_range * 30) +  # Emotional range (30%)
-                    (abs(latest_entry.sentiment.compound_score) * 30)  # Intensity (30%)
-                )) if latest_entry.sentiment else 0
+                    # Score based on length, emotional range, and sentiment intensity
+                    reflection_score = min(100, (
+                        (words / 200) * 40 +  # Length component (40%)
+                        (sentiment_range * 30) +  # Emotional range (30%)
+                        (abs(latest_entry.sentiment.compound_score) * 30)  # Intensity (30%)
+                    )) if latest_entry.sentiment else 0
                 
-                profile.reflection_score = reflection_score
+                    profile.reflection_score = reflection_score
             
-            self.session.commit()
+                session.commit()
             
-            # Check for achievements
-            await self.check_achievements(profile)
+                # Check for achievements
+                await self.check_achievements(session, profile)
             
-        except Exception as e:
-            logger.error(f"Error updating profile stats: {str(e)}")
-            self.session.rollback()
-            raise
+            except Exception as e:
+                logger.error(f"Error updating profile stats: {str(e)}")
+                session.rollback()
+                raise
 
-    async def check_achievements(self, profile: UserProfile) -> list:
-        """Check and award any newly earned achievements"""
+    async def check_achievements(self, session: Session, profile: UserProfile) -> list:
+        """Check and award any newly earned achievements for a profile loaded in the given session"""
         new_achievements = []
         
         try:
-            all_achievements = self.session.query(Achievement).all()
+            all_achievements = session.query(Achievement).all()
+            
+            # The user's achievement rows, loaded once and looked up by achievement id
+            user_achievements = {ua.achievement_id: ua for ua in profile.achievements}
             
             for achievement in all_achievements:
                 # Skip if already earned
-                if any(ua.achievement_id == achievement.id for ua in profile.achievements):
+                if achievement.id in user_achievements:
                     continue
                 
                 # Check if achievement criteria are met
@@ -224,7 +236,8 @@ class GamificationManager:
                 elif achievement.criteria_type == 'emotion_variety':
                     # Count unique dominant emotions in recent entries
                     recent_entries = (
-                        self.session.query(ChatLog)
+                        session.query(ChatLog)
+                        .options(joinedload(ChatLog.sentiment))
                         .filter_by(user_id=profile.user_id)
                         .order_by(desc(ChatLog.timestamp))
                         .limit(10)
@@ -234,10 +247,7 @@ class GamificationManager:
                     emotions = set()
                     for entry in recent_entries:
                         if entry.sentiment:
-                            emotions.add(max(
-                                ['joy', 'trust', 'fear', 'surprise', 'sadness', 'disgust', 'anger', 'anticipation'],
-                                key=lambda e: getattr(entry.sentiment, e)
-                            ))
+                            emotions.add(entry.sentiment.dominant_emotion)
                     
                     progress = (len(emotions) / achievement.criteria_value) * 100
                     earned = len(emotions) >= achievement.criteria_value
@@ -246,7 +256,8 @@ class GamificationManager:
                     # Check for consistent sentiment improvement over 30 days
                     month_ago = datetime.now(UTC) - timedelta(days=30)
                     entries = (
-                        self.session.query(ChatLog)
+                        session.query(ChatLog)
+                        .options(joinedload(ChatLog.sentiment))
                         .filter(
                             ChatLog.user_id == profile.user_id,
                             ChatLog.timestamp >= month_ago
@@ -278,18 +289,11 @@ class GamificationManager:
                         achievement_id=achievement.id,
                         progress=100.0
                     )
-                    self.session.add(new_achievement)
+                    session.add(new_achievement)
                     new_achievements.append(achievement)
                 else:
                     # Store progress
-                    existing_progress = (
-                        self.session.query(UserAchievement)
-                        .filter_by(
-                            user_id=profile.user_id,
-                            achievement_id=achievement.id
-                        )
-                        .first()
-                    )
+                    existing_progress = user_achievements.get(achievement.id)
                     
                     if existing_progress:
                         existing_progress.progress = progress
@@ -299,69 +303,70 @@ class GamificationManager:
                             achievement_id=achievement.id,
                             progress=progress
                         )
-                        self.session.add(new_progress)
+                        session.add(new_progress)
             
-            self.session.commit()
+            session.commit()
             return new_achievements
             
         except Exception as e:
             logger.error(f"Error checking achievements: {str(e)}")
-            self.session.rollback()
+            session.rollback()
             return []
 
     async def get_profile_data(self, user_id: str) -> dict:
         """Get formatted profile data for display"""
-        profile = self.session.query(UserProfile).filter_by(user_id=user_id).first()
-        if not profile:
-            return None
+        with self.session_factory() as session:
+            profile = session.query(UserProfile).filter_by(user_id=user_id).first()
+            if not profile:
+                return None
         
-        # Get earned achievements
-        earned_achievements = (
-            self.session.query(Achievement, UserAchievement)
-            .join(UserAchievement)
-            .filter(UserAchievement.user_id == user_id)
-            .all()
-        )
+            # Get earned achievements
+            earned_achievements = (
+                session.query(Achievement, UserAchievement)
+                .join(UserAchievement)
+                .filter(UserAchievement.user_id == user_id)
+                .all()
+            )
         
-        # Get in-progress achievements
-        in_progress = (
-            self.session.query(Achievement, UserAchievement)
-            .join(UserAchievement)
-            .filter(
-                UserAchievement.user_id == user_id,
-                UserAchievement.progress < 100
+            # Get in-progress achievements
+            in_progress = (
+                session.query(Achievement, UserAchievement)
+                .join(UserAchievement)
+                .filter(
+                    UserAchievement.user_id == user_id,
+                    UserAchievement.progress < 100
+                )
+                .all()
             )
-            .all()
-        )
         
-        return {
-            "username": profile.username,
-            "total_entries": profile.total_entries,
-            "total_words": profile.total_words,
-            "avg_sentiment": profile.avg_sentiment,
-            "current_streak": profile.streak_days,
-            "longest_streak": profile.longest_streak,
-            "last_entry": profile.last_entry_date,
-            "reflection_score": profile.reflection_score,
-            "earned_achievements": [
-                {
-                    "name": ach.name,
-                    "description": ach.description,
-                    "icon": ach.badge_icon,
-                    "earned_at": ua.earned_at
-                }
-                for ach, ua in earned_achievements
-            ],
-            "in_progress": [
-                {
-                    "name": ach.name,
-                    "description": ach.description,
-                    "icon": ach.badge_icon,
-                    "progress": ua.progress
-                }
-                for ach, ua in in_progress
-            ]
-        }
+            return {
+                "username": profile.username,
+                "total_entries": profile.total_entries,
+                "total_words": profile.total_words,
+                "avg_sentiment": profile.avg_sentiment,
+                "current_streak": profile.streak_days,
+                "longest_streak": profile.longest_streak,
+                "last_entry": profile.last_entry_date,
+                "reflection_score": profile.reflection_score,
+                "earned_achievements": [
+                    {
+                        "name": ach.name,
+                        "description": ach.description,
+                        "icon": ach.badge_icon,
+                        "earned_at": ua.earned_at
+                    }
+                    for ach, ua in earned_achievements
+                ],
+                "in_progress": [
+                    {
+                        "name": ach.name,
+                        "description": ach.description,
+                        "icon": ach.badge_icon,
+                        "progress": ua.progress
+                    }
+                    for ach, ua in in_progress
+                ]
+            }
 
     async def get_leaderboard(self, category: str = "total_entries", limit: int = 10) -> list:
         """Get leaderboard data for a specific category"""
@@ -376,49 +381,50 @@ class GamificationManager:
         if category not in valid_categories:
             raise ValueError(f"Invalid leaderboard category: {category}")
         
-        if category == "achievements":
-            # Count achievements per user
-            leaderboard = (
-                self.session.query(
-                    UserProfile.username,
-                    func.count(UserAchievement.id).label('achievement_count')
+        with self.session_factory() as session:
+            if category == "achievements":
+                # Count achievements per user
+                leaderboard = (
+                    session.query(
+                        UserProfile.username,
+                        func.count(UserAchievement.id).label('achievement_count')
+                    )
+                    .join(UserAchievement)
+                    .group_by(UserProfile.user_id)
+                    .order_by(desc('achievement_count'))
+                    .limit(limit)
+                    .all()
                 )
-                .join(UserAchievement)
-                .group_by(UserProfile.user_id)
-                .order_by(desc('achievement_count'))
-                .limit(limit)
-                .all()
-            )
-            
-            return [
-                {
-                    "username": entry[0],
-                    "value": entry[1],
-                    "label": "achievements earned"
-                }
-                for entry in leaderboard
-            ]
-        else:
-            # Get leaderboard for other categories
-            leaderboard = (
-                self.session.query(UserProfile)
-                .order_by(desc(valid_categories[category]))
-                .limit(limit)
-                .all()
-            )
             
-            labels = {
-                "total_entries": "entries",
-                "streak": "day streak",
-                "words": "words written",
-                "reflection": "reflection score"
-            }
+                return [
+                    {
+                        "username": entry[0],
+                        "value": entry[1],
+                        "label": "achievements earned"
+                    }
+                    for entry in leaderboard
+                ]
+            else:
+                # Get leaderboard for other categories
+                leaderboard = (
+                    session.query(UserProfile)
+                    .order_by(desc(valid_categories[category]))
+                    .limit(limit)
+                    .all()
+                )
             
-            return [
-                {
-                    "username": profile.username,
-                    "value": getattr(profile, category),
-                    "label": labels[category]
+                labels = {
+                    "total_entries": "entries",
+                    "streak": "day streak",
+                    "words": "words written",
+                    "reflection": "reflection score"
                 }
-                for profile in leaderboard
-            ] 
\ No newline at end of file
+            
+                return [
+                    {
+                        "username": profile.username,
+                        "value": getattr(profile, category),
+                        "label": labels[category]
+                    }
+                    for profile in leaderboard
+                ] 
\ No newline at end of file
@@ -1,23 +1,66 @@
 from datetime import datetime, timedelta, UTC
+import hashlib
 import json
 import re
-from typing import Dict, List, Tuple, Any
-from sqlalchemy.orm import Session
-from models import ChatLog, MessageSentiment, FutureMessage, engine
-from sentiment_analyzer import SentimentAnalyzer
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Any
+from sqlalchemy.orm import joinedload
+from models import AsyncSession, ChatLog, MessageSentiment, FutureMessage, Session
+from sentiment_analyzer import SentimentAnalyzer, SentimentBatcher
 from mistralai import Mistral
-import os
+from settings import settings
 import logging
-from sqlalchemy.orm import sessionmaker
+import operator
+import time
+import numpy as np
 
 logger = logging.getLogger("discord")
 
+# How long per-user history/trend query results are reused before hitting the database again
+USER_QUERY_CACHE_TTL = 60  # seconds
+USER_QUERY_CACHE_SIZE = 1024
+
+# Trends cover whole days, so their results stay valid until midnight (UTC) unless the user writes;
+# writes invalidate them, and the date in the key retires them when the window moves
+TRENDS_CACHE_TTL = 24 * 60 * 60  # seconds
+
+# LLM analyses are reused while the prompt they were generated from (the entries) is unchanged
+ANALYSIS_CACHE_SIZE = 256
+
+# Plutchik emotion columns of MessageSentiment, in the order history/trend queries select them
+EMOTIONS = ("joy", "trust", "fear", "surprise", "sadness", "disgust", "anger", "anticipation")
+EMOTION_COLUMNS = tuple(getattr(MessageSentiment, emotion) for emotion in EMOTIONS)
+EMOTION_SCORES = operator.attrgetter(*EMOTIONS)  # A sentiment record's scores, in EMOTIONS order
+
+@dataclass
+class TimelineEntries:
+    """Column-oriented journal entries used to render the timeline"""
+    timestamps: np.ndarray  # datetime64[s], oldest to newest
+    compound_scores: np.ndarray  # float32, NaN where an entry has no sentiment
+    dominant_emotions: List[Optional[str]]  # None where an entry has no sentiment
+    contents: List[str]
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
 class JournalAnalyzer:
-    def __init__(self):
-        """Initialize the journal analyzer with necessary components"""
-        self.sentiment_analyzer = SentimentAnalyzer()
-        self.mistral_client = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
-        self.Session = sessionmaker(bind=engine)
+    def __init__(self, sentiment_analyzer: Optional[SentimentAnalyzer] = None):
+        """
+        Initialize the journal analyzer with necessary components
+
+        Args:
+            sentiment_analyzer: Shared sentiment analyzer (a new one is created if omitted)
+        """
+        self.sentiment_analyzer = sentiment_analyzer or SentimentAnalyzer()
+        self.sentiment_batcher = SentimentBatcher(self.sentiment_analyzer)
+        self.mistral_client = Mistral(api_key=settings().mistral_api_key)
+        self.Session = Session  # Shared pooled session factory from models
+        
+        # Short-lived cache of per-user query results: (kind, user_id, arg) -> (expires_at, result)
+        self._user_query_cache = {}
+        
+        # LRU of LLM outputs: (kind, user_id, prompt hash) -> result
+        self._analysis_cache = {}
         
         # Define the prompt template for theme analysis
         self.theme_analysis_prompt = """You are a psychological analysis assistant. Analyze the following journal entry and provide a structured analysis.
@@ -214,7 +257,7 @@ Create a short guided meditation (max 1500 characters) that:
         
         return text
 
-    def log_entry(self, user_id: str, entry_text: str) -> Tuple[ChatLog, MessageSentiment]:
+    async def log_entry(self, user_id: str, entry_text: str) -> Tuple[ChatLog, MessageSentiment]:
         """
         Store a journal entry with its analysis in the database
         
@@ -228,33 +271,25 @@ Create a short guided meditation (max 1500 characters) that:
         # Preprocess the entry text
         processed_text = self.preprocess_text(entry_text)
         
-        # Create database session
-        db_session = self.Session()
-        try:
-            # Create chat log entry
-            chat_log = ChatLog(
-                user_id=user_id,
-                username=user_id,  # Using user_id as username for journal entries
-                message_content=processed_text,
-                bot_response="Journal Entry Logged",  # Placeholder response
-                timestamp=datetime.now(UTC)
-            )
+        # Create chat log entry
+        chat_log = ChatLog(
+            user_id=user_id,
+            username=user_id,  # Using user_id as username for journal entries
+            message_content=processed_text,
+            bot_response="Journal Entry Logged",  # Placeholder response
+            timestamp=datetime.now(UTC)
+        )
+        
+        # Analyze off the event loop, then attach the record so both are saved together
+        analysis = await self.sentiment_batcher.submit(processed_text)
+        sentiment = self.sentiment_analyzer.create_sentiment_record(chat_log, analysis)
+        
+        # Adding the chat log cascades to its sentiment; committed on leaving the block
+        async with AsyncSession() as db_session, db_session.begin():
             db_session.add(chat_log)
-            db_session.flush()  # Get the chat_log.id
-            
-            # Create sentiment record
-            sentiment = self.sentiment_analyzer.create_sentiment_record(
-                db_session, 
-                chat_log.id, 
-                processed_text
-            )
-            
-            # Commit the transaction
-            db_session.commit()
-            return chat_log, sentiment
-            
-        finally:
-            db_session.close()
+        
+        self.invalidate_user_cache(user_id)
+        return chat_log, sentiment
 
     async def analyze_sentiment(self, entry_text: str) -> Dict[str, Any]:
         """
@@ -266,12 +301,49 @@ Create a short guided meditation (max 1500 characters) that:
         Returns:
             Dictionary containing sentiment scores, emotions, and thematic analysis
         """
-        # Get basic sentiment analysis
-        sentiment_analysis = self.sentiment_analyzer.analyze(entry_text)
+        # Get basic sentiment analysis; the text is preprocessed the same way as in log_entry,
+        # so an entry that was just logged is served from the sentiment cache instead of rerun
+        sentiment_analysis = await self.sentiment_batcher.submit(self.preprocess_text(entry_text))
         
-        # Perform theme analysis using Mistral
+        # Perform theme analysis using Mistral (unless this entry was analyzed before)
         theme_prompt = self.theme_analysis_prompt.format(entry_text=entry_text)
+        theme_key = self._analysis_key("themes", None, theme_prompt)
+        theme_analysis = self._get_analysis(theme_key)
+        if theme_analysis is None:
+            theme_analysis = await self._analyze_themes(theme_prompt)
+            if theme_analysis is not None:
+                self._set_analysis(theme_key, theme_analysis)
+            else:
+                # Provide meaningful fallback content
+                theme_analysis = {
+                    "themes": ["Personal Experience", "Daily Activities", "Self-Reflection"],
+                    "emotional_patterns": ["Emotional Processing", "Adaptive Response"],
+                    "recurring_ideas": ["Personal Growth", "Life Experiences"],
+                    "growth_indicators": ["Learning Process", "Self-Awareness"],
+                    "focus_areas": ["Emotional Management", "Personal Development"]
+                }
         
+        # Combine sentiment and theme analysis
+        return {
+            "sentiment": {
+                "compound_score": sentiment_analysis["compound_score"],
+                "emotions": sentiment_analysis["emotions"],
+                "intensity": sentiment_analysis["intensity"],
+                "confidence": sentiment_analysis["confidence"]
+            },
+            "themes": theme_analysis
+        }
+
+    async def _analyze_themes(self, theme_prompt: str) -> Optional[Dict[str, List[str]]]:
+        """
+        Ask Mistral for the theme analysis of a journal entry
+        
+        Args:
+            theme_prompt: The formatted theme analysis prompt
+            
+        Returns:
+            The validated theme analysis, or None if it could not be generated
+        """
         try:
             theme_response = await self.mistral_client.chat.complete_async(
                 model="mistral-large-latest",
@@ -309,29 +381,60 @@ Create a short guided meditation (max 1500 characters) that:
                 while len(theme_analysis[key]) < 2:
                     theme_analysis[key].append(f"Additional {key.replace('_', ' ')}")
             
+            return theme_analysis
+            
         except Exception as e:
             logger.error(f"Error in theme analysis: {str(e)}")
             logger.error(f"Response text: {response_text if 'response_text' in locals() else 'No response'}")
-            
-            # Provide meaningful fallback content
-            theme_analysis = {
-                "themes": ["Personal Experience", "Daily Activities", "Self-Reflection"],
-                "emotional_patterns": ["Emotional Processing", "Adaptive Response"],
-                "recurring_ideas": ["Personal Growth", "Life Experiences"],
-                "growth_indicators": ["Learning Process", "Self-Awareness"],
-                "focus_areas": ["Emotional Management", "Personal Development"]
-            }
+            return None
+
+    def _get_cached(self, key: Tuple) -> Any:
+        """Return a cached query result, or None if missing or expired"""
+        cached = self._user_query_cache.get(key)
+        if cached is None:
+            return None
+        expires_at, result = cached
+        if time.monotonic() >= expires_at:
+            del self._user_query_cache[key]
+            return None
+        return result
+
+    def _set_cached(self, key: Tuple, result: Any, ttl: float = USER_QUERY_CACHE_TTL):
+        """Cache a query result for ttl seconds"""
+        if len(self._user_query_cache) >= USER_QUERY_CACHE_SIZE:
+            # Drop the oldest entry (dicts preserve insertion order)
+            self._user_query_cache.pop(next(iter(self._user_query_cache)))
+        self._user_query_cache[key] = (time.monotonic() + ttl, result)
+
+    def invalidate_user_cache(self, user_id: str):
+        """
+        Drop cached query results and LLM analyses for a user after their entries change
         
-        # Combine sentiment and theme analysis
-        return {
-            "sentiment": {
-                "compound_score": sentiment_analysis["compound_score"],
-                "emotions": sentiment_analysis["emotions"],
-                "intensity": sentiment_analysis["intensity"],
-                "confidence": sentiment_analysis["confidence"]
-            },
-            "themes": theme_analysis
-        }
+        Args:
+            user_id: The user's unique identifier
+        """
+        for key in [key for key in self._user_query_cache if key[1] == user_id]:
+            del self._user_query_cache[key]
+        for key in [key for key in self._analysis_cache if key[1] == user_id]:
+            del self._analysis_cache[key]
+
+    @staticmethod
+    def _analysis_key(kind: str, user_id: Optional[str], prompt: str) -> Tuple[str, Optional[str], str]:
+        """Key an LLM analysis by its kind, its user and a hash of the prompt it was generated from"""
+        return kind, user_id, hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+
+    def _get_analysis(self, key: Tuple) -> Any:
+        """Return a cached LLM analysis (marking it recently used), or None if missing"""
+        if key not in self._analysis_cache:
+            return None
+        self._analysis_cache[key] = self._analysis_cache.pop(key)
+        return self._analysis_cache[key]
+
+    def _set_analysis(self, key: Tuple, result: Any):
+        """Cache an LLM analysis, evicting the least recently used one when full"""
+        self._analysis_cache[key] = result
+        while len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+            self._analysis_cache.pop(next(iter(self._analysis_cache)))
 
     async def get_user_history(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -343,45 +446,47 @@ Create a short guided meditation (max 1500 characters) that:
             
         Returns:
             List of dictionaries containing entry text, sentiment, and analysis
+            (shared with the query cache, so callers must not modify it)
         """
-        db_session = self.Session()
-        try:
-            # Get recent entries for the user
-            entries = (
-                db_session.query(ChatLog)
+        cache_key = ("history", user_id, limit)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+        
+        with self.Session() as db_session:
+            # Get recent analyzed entries, selecting only the columns shown in the history
+            rows = (
+                db_session.query(
+                    ChatLog.timestamp,
+                    ChatLog.message_content,
+                    MessageSentiment.compound_score,
+                    MessageSentiment.intensity,
+                    MessageSentiment.confidence,
+                    MessageSentiment.dominant_emotion
+                )
+                .join(MessageSentiment, MessageSentiment.chat_log_id == ChatLog.id)
                 .filter(ChatLog.user_id == user_id)
                 .order_by(ChatLog.timestamp.desc())
                 .limit(limit)
                 .all()
             )
-            
-            history = []
-            for entry in entries:
-                if entry.sentiment:
-                    history.append({
-                        "timestamp": entry.timestamp.isoformat(),
-                        "text": entry.message_content,
-                        "sentiment": {
-                            "compound_score": entry.sentiment.compound_score,
-                            "dominant_emotion": max([
-                                ("joy", entry.sentiment.joy),
-                                ("trust", entry.sentiment.trust),
-                                ("fear", entry.sentiment.fear),
-                                ("surprise", entry.sentiment.surprise),
-                                ("sadness", entry.sentiment.sadness),
-                                ("disgust", entry.sentiment.disgust),
-                                ("anger", entry.sentiment.anger),
-                                ("anticipation", entry.sentiment.anticipation)
-                            ], key=lambda x: x[1])[0],
-                            "intensity": entry.sentiment.intensity,
-                            "confidence": entry.sentiment.confidence
-                        }
-                    })
-            
-            return history
-            
-        finally:
-            db_session.close()
+        
+        history = [
+            {
+                "timestamp": row.timestamp,
+                "text": row.message_content,
+                "sentiment": {
+                    "compound_score": row.compound_score,
+                    "dominant_emotion": row.dominant_emotion,
+                    "intensity": row.intensity,
+                    "confidence": row.confidence
+                }
+            }
+            for row in rows
+        ]
+        
+        self._set_cached(cache_key, history)
+        return history
 
     async def get_emotional_trends(self, user_id: str, days: int = 30) -> Dict[str, Any]:
         """
@@ -389,17 +494,30 @@ Create a short guided meditation (max 1500 characters) that:
         
         Args:
             user_id: The user's unique identifier
-            days: Number of days to analyze
+            days: Number of whole days before today to analyze, plus today so far
             
         Returns:
             Dictionary containing emotional trends and patterns
+            (shared with the query cache, so callers must not modify it)
         """
-        db_session = self.Session()
-        try:
-            # Get entries within the specified time range
-            cutoff_date = datetime.now(UTC) - timedelta(days=days)
-            entries = (
-                db_session.query(ChatLog)
+        # The window starts at midnight, so the same query serves the rest of the day
+        today = datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+        cache_key = ("trends", user_id, days, today)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+        
+        with self.Session() as db_session:
+            # Get analyzed entries within the specified time range, selecting only the score columns
+            cutoff_date = today - timedelta(days=days)
+            rows = (
+                db_session.query(
+                    ChatLog.timestamp,
+                    MessageSentiment.compound_score,
+                    MessageSentiment.dominant_emotion,
+                    *EMOTION_COLUMNS
+                )
+                .join(MessageSentiment, MessageSentiment.chat_log_id == ChatLog.id)
                 .filter(
                     ChatLog.user_id == user_id,
                     ChatLog.timestamp >= cutoff_date
@@ -407,48 +525,19 @@ Create a short guided meditation (max 1500 characters) that:
                 .order_by(ChatLog.timestamp.asc())
                 .all()
             )
-            
-            # Calculate emotional trends
-            emotion_scores = {
-                "joy": [],
-                "trust": [],
-                "fear": [],
-                "surprise": [],
-                "sadness": [],
-                "disgust": [],
-                "anger": [],
-                "anticipation": []
-            }
-            
-            compound_scores = []
-            dates = []
-            
-            for entry in entries:
-                if entry.sentiment:
-                    dates.append(entry.timestamp.date().isoformat())
-                    compound_scores.append(entry.sentiment.compound_score)
-                    
-                    for emotion in emotion_scores:
-                        emotion_scores[emotion].append(
-                            getattr(entry.sentiment, emotion)
-                        )
-            
-            # Calculate trends and patterns
-            return {
-                "dates": dates,
-                "compound_trend": compound_scores,
-                "emotion_trends": emotion_scores,
-                "dominant_emotions": [
-                    max(
-                        [(emotion, scores[i]) for emotion, scores in emotion_scores.items()],
-                        key=lambda x: x[1]
-                    )[0]
-                    for i in range(len(dates))
-                ] if dates else []  # Add check for empty dates list
-            }
-            
-        finally:
-            db_session.close()
+        
+        # Calculate trends and patterns
+        trends = {
+            "dates": [row.timestamp.date().isoformat() for row in rows],
+            "compound_trend": np.asarray([row.compound_score for row in rows], dtype=np.float32),
+            "emotion_trends": {
+                emotion: [row[3 + i] for row in rows]
+                for i, emotion in enumerate(EMOTIONS)
+            },
+            "dominant_emotions": [row.dominant_emotion for row in rows]
+        }
+        self._set_cached(cache_key, trends, TRENDS_CACHE_TTL)
+        return trends
 
     async def create_future_message(self, user_id: str, username: str, message: str) -> Tuple[Dict[str, Any], str]:
         """
@@ -462,29 +551,13 @@ Create a short guided meditation (max 1500 characters) that:
         Returns:
             Tuple of (Future message dict with all attributes, contextualized message string)
         """
-        db_session = self.Session()
+        db_session = None
         try:
             # First, perform sentiment analysis
-            sentiment_analysis = self.sentiment_analyzer.analyze(message)
-            
-            # Create sentiment record
-            sentiment = MessageSentiment(
-                joy=sentiment_analysis["emotions"]["joy"],
-                trust=sentiment_analysis["emotions"]["trust"],
-                fear=sentiment_analysis["emotions"]["fear"],
-                surprise=sentiment_analysis["emotions"]["surprise"],
-                sadness=sentiment_analysis["emotions"]["sadness"],
-                disgust=sentiment_analysis["emotions"]["disgust"],
-                anger=sentiment_analysis["emotions"]["anger"],
-                anticipation=sentiment_analysis["emotions"]["anticipation"],
-                confidence=sentiment_analysis["confidence"],
-                intensity=sentiment_analysis["intensity"],
-                compound_score=sentiment_analysis["compound_score"]
-            )
-            db_session.add(sentiment)
-            db_session.flush()  # Get the sentiment ID
+            sentiment_analysis = await self.sentiment_batcher.submit(message)
             
-            # Get AI contextualization
+            # Get AI contextualization before opening the session, so no write transaction
+            # stays open (locking the SQLite file) while the API call runs
             future_prompt = self.future_message_prompt.format(message=message)
             response = await self.mistral_client.chat.complete_async(
                 model="mistral-large-latest",
@@ -496,6 +569,12 @@ Create a short guided meditation (max 1500 characters) that:
             
             contextualized_message = response.choices[0].message.content.strip()
             
+            # Create sentiment record
+            db_session = self.Session()
+            sentiment = self.sentiment_analyzer.build_sentiment_record(sentiment_analysis)
+            db_session.add(sentiment)
+            db_session.flush()  # Get the sentiment ID
+            
             # Create future message record
             future_message = FutureMessage(
                 user_id=user_id,
@@ -524,10 +603,12 @@ Create a short guided meditation (max 1500 characters) that:
             
         except Exception as e:
             logger.error(f"Error creating future message: {str(e)}")
-            db_session.rollback()
+            if db_session is not None:
+                db_session.rollback()
             raise
         finally:
-            db_session.close()
+            if db_session is not None:
+                db_session.close()
 
     async def get_future_messages(self, user_id: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
@@ -544,6 +625,7 @@ Create a short guided meditation (max 1500 characters) that:
         try:
             messages = (
                 db_session.query(FutureMessage)
+                .options(joinedload(FutureMessage.sentiment))
                 .filter(FutureMessage.user_id == user_id)
                 .order_by(FutureMessage.created_at.desc())
                 .limit(limit)
@@ -551,21 +633,12 @@ Create a short guided meditation (max 1500 characters) that:
             )
             
             return [{
-                "created_at": msg.created_at.isoformat(),
+                "created_at": msg.created_at,
                 "original_message": msg.original_message,
                 "contextualized_message": msg.contextualized_message,
                 "sentiment": {
                     "compound_score": msg.sentiment.compound_score,
-                    "dominant_emotion": max([
-                        ("joy", msg.sentiment.joy),
-                        ("trust", msg.sentiment.trust),
-                        ("fear", msg.sentiment.fear),
-                        ("surprise", msg.sentiment.surprise),
-                        ("sadness", msg.sentiment.sadness),
-                        ("disgust", msg.sentiment.disgust),
-                        ("anger", msg.sentiment.anger),
-                        ("anticipation", msg.sentiment.anticipation)
-                    ], key=lambda x: x[1])[0]
+                    "dominant_emotion": msg.sentiment.dominant_emotion
                 } if msg.sentiment else None
             } for msg in messages]
             
@@ -610,23 +683,28 @@ Create a short guided meditation (max 1500 characters) that:
                 formatted_entries.append(f"Date: {date_str}\nEntry: {entry.message_content}\n")
             
             entries_text = "\n".join(formatted_entries)
+            reflection_prompt = self.reflection_prompt.format(entries=entries_text)
             
-            # Generate reflection using Mistral
-            reflection_response = await self.mistral_client.chat.complete_async(
-                model="mistral-large-latest",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an empathetic AI assistant providing insightful reflection analysis."
-                    },
-                    {
-                        "role": "user",
-                        "content": self.reflection_prompt.format(entries=entries_text)
-                    }
-                ]
-            )
-            
-            reflection_text = reflection_response.choices[0].message.content.strip()
+            # Generate reflection using Mistral, unless these exact entries were reflected on before
+            reflection_key = self._analysis_key("reflection", user_id, reflection_prompt)
+            reflection_text = self._get_analysis(reflection_key)
+            if reflection_text is None:
+                reflection_response = await self.mistral_client.chat.complete_async(
+                    model="mistral-large-latest",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are an empathetic AI assistant providing insightful reflection analysis."
+                        },
+                        {
+                            "role": "user",
+                            "content": reflection_prompt
+                        }
+                    ]
+                )
+                
+                reflection_text = reflection_response.choices[0].message.content.strip()
+                self._set_analysis(reflection_key, reflection_text)
             
             # Calculate some metadata
             entry_count = len(entries)
@@ -654,74 +732,78 @@ Create a short guided meditation (max 1500 characters) that:
         finally:
             db_session.close()
 
-    async def generate_timeline(self, user_id: str) -> Dict[str, Any]:
+    async def generate_timeline(self, user_id: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
         """
         Generate a comprehensive timeline analysis of all user entries
         
+        The timeline is yielded as soon as it is built, before the (slow) reflective letter,
+        so callers can show it while the letter is being written
+        
         Args:
             user_id: The user's unique identifier
             
-        Returns:
-            Dictionary containing timeline data, milestones, and reflective letter
+        Yields:
+            ("timeline", dict with timeline data, milestones and metadata), then
+            ("reflective_letter", dict with the letter); either dict has success False on failure
         """
-        db_session = self.Session()
         try:
-            # Get all entries for the user
-            entries = (
-                db_session.query(ChatLog)
-                .filter(ChatLog.user_id == user_id)
-                .order_by(ChatLog.timestamp.asc())  # Oldest to newest
-                .all()
-            )
+            # Get all entries for the user, selecting only the columns the timeline uses;
+            # the session is released before the letter is generated
+            with self.Session() as db_session:
+                rows = (
+                    db_session.query(
+                        ChatLog.timestamp,
+                        ChatLog.message_content,
+                        MessageSentiment.id.label("sentiment_id"),
+                        MessageSentiment.compound_score,
+                        MessageSentiment.dominant_emotion
+                    )
+                    .outerjoin(MessageSentiment, MessageSentiment.chat_log_id == ChatLog.id)
+                    .filter(ChatLog.user_id == user_id)
+                    .order_by(ChatLog.timestamp.asc())  # Oldest to newest
+                    .all()
+                )
             
-            if not entries:
-                return {
+            if not rows:
+                yield "timeline", {
                     "success": False,
                     "message": "No journal entries found to create a timeline."
                 }
+                return
             
-            # Format entries and calculate sentiment trends
-            formatted_entries = []
+            # Convert the timestamps once and format every date in a single vectorized pass
+            timestamps = np.array([row.timestamp.replace(tzinfo=None) for row in rows], dtype="datetime64[s]")
+            date_strs = np.datetime_as_string(timestamps, unit="D").tolist()
+            
+            # Collect entry columns and calculate sentiment trends
+            compound_scores = []
+            dominant_emotions = []
+            contents = []
+            prompt_entries = []
             sentiment_data = []
             milestones = []
             prev_sentiment = None
             
-            for i, entry in enumerate(entries):
-                # Format entry for display
-                date_str = entry.timestamp.strftime("%Y-%m-%d")
-                formatted_entries.append({
-                    "date": date_str,
-                    "content": entry.message_content,
-                    "timestamp": entry.timestamp.isoformat(),
-                    "sentiment": None if not entry.sentiment else {
-                        "compound_score": entry.sentiment.compound_score,
-                        "dominant_emotion": max([
-                            ("joy", entry.sentiment.joy),
-                            ("trust", entry.sentiment.trust),
-                            ("fear", entry.sentiment.fear),
-                            ("surprise", entry.sentiment.surprise),
-                            ("sadness", entry.sentiment.sadness),
-                            ("disgust", entry.sentiment.disgust),
-                            ("anger", entry.sentiment.anger),
-                            ("anticipation", entry.sentiment.anticipation)
-                        ], key=lambda x: x[1])[0]
-                    }
-                })
+            for i, (row, date_str) in enumerate(zip(rows, date_strs)):
+                has_sentiment = row.sentiment_id is not None
+                emotion = row.dominant_emotion if has_sentiment else None
+                
+                compound_scores.append(row.compound_score if has_sentiment else np.nan)
+                dominant_emotions.append(emotion)
+                contents.append(row.message_content)
+                
+                # Format entry for the AI prompt
+                prompt_entries.append(
+                    f"Date: {date_str}\n"
+                    f"Entry: {row.message_content}\n"
+                    f"Emotion: {emotion or 'Unknown'}\n"
+                )
                 
                 # Track sentiment changes for milestone detection
-                if entry.sentiment:
+                if has_sentiment:
                     current_sentiment = {
-                        "score": entry.sentiment.compound_score,
-                        "emotion": max([
-                            ("joy", entry.sentiment.joy),
-                            ("trust", entry.sentiment.trust),
-                            ("fear", entry.sentiment.fear),
-                            ("surprise", entry.sentiment.surprise),
-                            ("sadness", entry.sentiment.sadness),
-                            ("disgust", entry.sentiment.disgust),
-                            ("anger", entry.sentiment.anger),
-                            ("anticipation", entry.sentiment.anticipation)
-                        ], key=lambda x: x[1])[0]
+                        "score": row.compound_score,
+                        "emotion": emotion
                     }
                     
                     sentiment_data.append(current_sentiment)
@@ -737,68 +819,85 @@ Create a short guided meditation (max 1500 characters) that:
                     
                     prev_sentiment = current_sentiment
             
-            # Format entries for the AI prompt
-            prompt_entries = []
-            for entry in formatted_entries:
-                prompt_entries.append(
-                    f"Date: {entry['date']}\n"
-                    f"Entry: {entry['content']}\n"
-                    f"Emotion: {entry['sentiment']['dominant_emotion'] if entry['sentiment'] else 'Unknown'}\n"
-                )
+            timeline_entries = TimelineEntries(
+                timestamps=timestamps,
+                compound_scores=np.array(compound_scores, dtype=np.float32),
+                dominant_emotions=dominant_emotions,
+                contents=contents
+            )
+            start_date = date_strs[0]
+            end_date = date_strs[-1]
             
             # Calculate overall sentiment trends
             sentiment_trends = {
-                "start_period": formatted_entries[0]["date"],
-                "end_period": formatted_entries[-1]["date"],
+                "start_period": start_date,
+                "end_period": end_date,
                 "overall_direction": "improving" if sentiment_data[-1]["score"] > sentiment_data[0]["score"] else "declining",
                 "dominant_emotions": list(set(s["emotion"] for s in sentiment_data[:5]))  # Most recent emotions
             }
             
-            # Generate reflective letter using Mistral
-            letter_response = await self.mistral_client.chat.complete_async(
-                model="mistral-large-latest",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an empathetic AI assistant creating a personalized reflective letter."
-                    },
-                    {
-                        "role": "user",
-                        "content": self.timeline_prompt.format(
-                            entries="\n\n".join(prompt_entries),
-                            sentiment_trends=json.dumps(sentiment_trends, indent=2)
-                        )
-                    }
-                ]
-            )
-            
-            reflective_letter = letter_response.choices[0].message.content.strip()
-            
-            return {
+            yield "timeline", {
                 "success": True,
                 "timeline": {
-                    "entries": formatted_entries,
+                    "entries": timeline_entries,
                     "milestones": milestones,
                     "sentiment_trends": sentiment_trends
                 },
-                "reflective_letter": reflective_letter,
                 "metadata": {
-                    "entry_count": len(entries),
+                    "entry_count": len(rows),
                     "date_range": {
-                        "start": formatted_entries[0]["date"],
-                        "end": formatted_entries[-1]["date"]
+                        "start": start_date,
+                        "end": end_date
                     }
                 }
             }
             
         except Exception as e:
             logger.error(f"Error generating timeline: {str(e)}")
-            return {
+            yield "timeline", {
                 "success": False,
                 "message": f"Error generating timeline: {str(e)}"
             }
-        finally:
-            db_session.close()
+            return
+        
+        try:
+            letter_prompt = self.timeline_prompt.format(
+                entries="\n\n".join(prompt_entries),
+                sentiment_trends=json.dumps(sentiment_trends, indent=2)
+            )
+            
+            # Generate reflective letter using Mistral, unless the timeline is unchanged since the last one
+            letter_key = self._analysis_key("reflective_letter", user_id, letter_prompt)
+            reflective_letter = self._get_analysis(letter_key)
+            if reflective_letter is None:
+                letter_response = await self.mistral_client.chat.complete_async(
+                    model="mistral-large-latest",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are an empathetic AI assistant creating a personalized reflective letter."
+                        },
+                        {
+                            "role": "user",
+                            "content": letter_prompt
+                        }
+                    ]
+                )
+                
+                reflective_letter = letter_response.choices[0].message.content.strip()
+                self._set_analysis(letter_key, reflective_letter)
+            
+            yield "reflective_letter", {
+                "success": True,
+                "reflective_letter": reflective_letter
+            }
+            
+        except Exception as e:
+            logger.error(f"Error generating reflective letter: {str(e)}")
+            yield "reflective_letter", {
+                "success": False,
+                "message": f"Error generating reflective letter: {str(e)}"
+            }
 
     async def store_feedback(self, user_id: str, username: str, feedback_text: str, rating: int) -> Dict[str, Any]:
         """
@@ -813,53 +912,28 @@ Create a short guided meditation (max 1500 characters) that:
         Returns:
             Dictionary containing analysis results
         """
-        db_session = self.Session()
+        from models import Feedback
+        db_session = None
         try:
             # First, perform sentiment analysis
-            sentiment_analysis = self.sentiment_analyzer.analyze(feedback_text)
-            
-            # Create sentiment record
-            sentiment = MessageSentiment(
-                joy=sentiment_analysis["emotions"]["joy"],
-                trust=sentiment_analysis["emotions"]["trust"],
-                fear=sentiment_analysis["emotions"]["fear"],
-                surprise=sentiment_analysis["emotions"]["surprise"],
-                sadness=sentiment_analysis["emotions"]["sadness"],
-                disgust=sentiment_analysis["emotions"]["disgust"],
-                anger=sentiment_analysis["emotions"]["anger"],
-                anticipation=sentiment_analysis["emotions"]["anticipation"],
-                confidence=sentiment_analysis["confidence"],
-                intensity=sentiment_analysis["intensity"],
-                compound_score=sentiment_analysis["compound_score"]
-            )
-            db_session.add(sentiment)
-            db_session.flush()  # Get the sentiment ID
-            
-            # Create feedback record
-            from models import Feedback
-            feedback = Feedback(
-                user_id=user_id,
-                username=username,
-                feedback_text=feedback_text,
-                rating=rating,
-                sentiment_id=sentiment.id
-            )
-            db_session.add(feedback)
+            sentiment_analysis = await self.sentiment_batcher.submit(feedback_text)
             
             # Get previous feedback themes for context
-            previous_feedback = (
-                db_session.query(Feedback)
-                .order_by(Feedback.created_at.desc())
-                .limit(5)
-                .all()
-            )
+            with self.Session() as read_session:
+                previous_feedback = (
+                    read_session.query(Feedback.feedback_text)
+                    .order_by(Feedback.created_at.desc())
+                    .limit(5)
+                    .all()
+                )
             
             previous_themes = "No previous feedback available."
             if previous_feedback:
                 themes = [f"- {f.feedback_text[:100]}..." for f in previous_feedback]
                 previous_themes = "\n".join(themes)
             
-            # Generate feedback analysis using Mistral
+            # Generate feedback analysis using Mistral before opening the write, so no
+            # transaction stays open (locking the SQLite file) while the API call runs
             analysis_response = await self.mistral_client.chat.complete_async(
                 model="mistral-large-latest",
                 messages=[
@@ -879,6 +953,22 @@ Create a short guided meditation (max 1500 characters) that:
             
             analysis_text = analysis_response.choices[0].message.content.strip()
             
+            # Create sentiment record
+            db_session = self.Session()
+            sentiment = self.sentiment_analyzer.build_sentiment_record(sentiment_analysis)
+            db_session.add(sentiment)
+            db_session.flush()  # Get the sentiment ID
+            
+            # Create feedback record
+            feedback = Feedback(
+                user_id=user_id,
+                username=username,
+                feedback_text=feedback_text,
+                rating=rating,
+                sentiment_id=sentiment.id
+            )
+            db_session.add(feedback)
+            
             # Commit the transaction
             db_session.commit()
             
@@ -888,28 +978,21 @@ Create a short guided meditation (max 1500 characters) that:
                 "analysis": analysis_text,
                 "sentiment": {
                     "compound_score": sentiment.compound_score,
-                    "dominant_emotion": max([
-                        ("joy", sentiment.joy),
-                        ("trust", sentiment.trust),
-                        ("fear", sentiment.fear),
-                        ("surprise", sentiment.surprise),
-                        ("sadness", sentiment.sadness),
-                        ("disgust", sentiment.disgust),
-                        ("anger", sentiment.anger),
-                        ("anticipation", sentiment.anticipation)
-                    ], key=lambda x: x[1])[0]
+                    "dominant_emotion": sentiment.dominant_emotion
                 }
             }
             
         except Exception as e:
             logger.error(f"Error storing feedback: {str(e)}")
-            db_session.rollback()
+            if db_session is not None:
+                db_session.rollback()
             return {
                 "success": False,
                 "message": f"Error storing feedback: {str(e)}"
             }
         finally:
-            db_session.close()
+            if db_session is not None:
+                db_session.close()
 
     async def analyze_feedback_trends(self) -> Dict[str, Any]:
         """
@@ -920,10 +1003,11 @@ Create a short guided meditation (max 1500 characters) that:
         """
         db_session = self.Session()
         try:
-            # Get all feedback entries
+            # Get all feedback entries (with their sentiments in the same query)
             from models import Feedback
             feedback_entries = (
                 db_session.query(Feedback)
+                .options(joinedload(Feedback.sentiment))
                 .order_by(Feedback.created_at.desc())
                 .all()
             )
@@ -1072,18 +1156,8 @@ Provide analysis in the following format:
         return significant_events
 
     def _get_dominant_emotion(self, sentiment):
-        """Get the dominant emotion from a sentiment record"""
-        emotions = {
-            "joy": sentiment.joy,
-            "trust": sentiment.trust,
-            "fear": sentiment.fear,
-            "surprise": sentiment.surprise,
-            "sadness": sentiment.sadness,
-            "disgust": sentiment.disgust,
-            "anger": sentiment.anger,
-            "anticipation": sentiment.anticipation
-        }
-        return max(emotions.items(), key=lambda x: x[1])[0]
+        """Get the dominant emotion from a sentiment record (stored when the record is written)"""
+        return sentiment.dominant_emotion
 
     async def generate_life_story(self, user_id: str) -> Dict[str, Any]:
         """
@@ -1102,6 +1176,7 @@ Provide analysis in the following format:
             # Retrieve all user's entries
             entries = (
                 db_session.query(ChatLog)
+                .options(joinedload(ChatLog.sentiment))
                 .filter(ChatLog.user_id == user_id)
                 .order_by(ChatLog.timestamp.asc())
                 .all()
@@ -1255,6 +1330,7 @@ Provide analysis in the following format:
             cutoff_date = datetime.now(UTC) - timedelta(days=days)
             entries = (
                 db_session.query(ChatLog)
+                .options(joinedload(ChatLog.sentiment))
                 .filter(
                     ChatLog.user_id == user_id,
                     ChatLog.timestamp >= cutoff_date
@@ -1315,7 +1391,10 @@ Provide analysis in the following format:
                         "role": "user",
                         "content": self.growth_forecast_prompt.format(
                             entries="\n\n".join(formatted_entries),
-                            emotional_trends=json.dumps(emotional_trends, indent=2),
+                            emotional_trends=json.dumps(
+                                {**emotional_trends, "compound_trend": emotional_trends["compound_trend"].tolist()},
+                                indent=2
+                            ),
                             themes=", ".join(themes)
                         )
                     }
@@ -1332,9 +1411,9 @@ Provide analysis in the following format:
             }
             
             # Calculate emotional stability score
-            if emotional_trends.get('compound_trend'):
-                scores = emotional_trends['compound_trend']
-                emotional_stability = 1 - (max(scores) - min(scores)) / 2  # 1 is most stable
+            scores = emotional_trends['compound_trend']
+            if scores.size:
+                emotional_stability = 1 - float(scores.max() - scores.min()) / 2  # 1 is most stable
             else:
                 emotional_stability = None
             
@@ -1375,6 +1454,7 @@ Provide analysis in the following format:
             cutoff_date = datetime.now(UTC) - timedelta(days=7)
             recent_entries = (
                 db_session.query(ChatLog)
+                .options(joinedload(ChatLog.sentiment))
                 .filter(
                     ChatLog.user_id == user_id,
                     ChatLog.timestamp >= cutoff_date
@@ -1401,25 +1481,12 @@ Provide analysis in the following format:
             try:
                 for entry in recent_entries:
                     if entry.sentiment:
-                        # Track emotion scores
-                        emotions = {
-                            'joy': entry.sentiment.joy,
-                            'trust': entry.sentiment.trust,
-                            'fear': entry.sentiment.fear,
-                            'surprise': entry.sentiment.surprise,
-                            'sadness': entry.sentiment.sadness,
-                            'disgust': entry.sentiment.disgust,
-                            'anger': entry.sentiment.anger,
-                            'anticipation': entry.sentiment.anticipation
-                        }
-                        
-                        # Update running totals
-                        for emotion, score in emotions.items():
+                        # Update running emotion totals
+                        for emotion, score in zip(EMOTIONS, EMOTION_SCORES(entry.sentiment)):
                             all_emotions[emotion] += score
                         
-                        # Get dominant emotion for this entry
-                        dominant = max(emotions.items(), key=lambda x: x[1])
-                        emotional_states.append(dominant[0])
+                        # Dominant emotion for this entry (stored with the record)
+                        emotional_states.append(entry.sentiment.dominant_emotion)
                         
                         # Track sentiment scores
                         sentiment_scores.append(entry.sentiment.compound_score)
@@ -1,20 +1,21 @@
 from datetime import datetime, timedelta, UTC
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import sessionmaker
 from sqlalchemy import desc
 from models import MemoryCapsule, CapsuleEntry, ChatLog
 from typing import Dict, List, Any
 import logging
 from mistralai import Mistral
-import os
+from settings import settings
 
 logger = logging.getLogger(__name__)
 
 class MemoryCapsuleManager:
     """Manage themed memory capsules and their entries"""
     
-    def __init__(self, session: Session):
-        self.session = session
-        self.mistral_client = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
+    def __init__(self, session_factory: sessionmaker):
+        # Each call opens its own short-lived session from the pooled engine
+        self.session_factory = session_factory
+        self.mistral_client = Mistral(api_key=settings().mistral_api_key)
         
         # Define the prompt template for generating capsule narratives
         self.narrative_prompt = """You are an AI assistant creating a narrative summary for a themed memory capsule.
@@ -35,155 +36,159 @@ Format the response with clear sections and thoughtful transitions."""
 
     async def create_capsule(self, user_id: str, name: str, description: str = None) -> Dict[str, Any]:
         """Create a new themed memory capsule"""
-        try:
-            # Check if capsule with same name exists for user
-            existing = (
-                self.session.query(MemoryCapsule)
-                .filter(
-                    MemoryCapsule.user_id == user_id,
-                    MemoryCapsule.name == name
+        with self.session_factory() as session:
+            try:
+                # Check if capsule with same name exists for user
+                existing = (
+                    session.query(MemoryCapsule)
+                    .filter(
+                        MemoryCapsule.user_id == user_id,
+                        MemoryCapsule.name == name
+                    )
+                    .first()
                 )
-                .first()
-            )
             
-            if existing:
-                return {
-                    "success": False,
-                    "message": f"A capsule named '{name}' already exists."
-                }
+                if existing:
+                    return {
+                        "success": False,
+                        "message": f"A capsule named '{name}' already exists."
+                    }
             
-            # Create new capsule
-            capsule = MemoryCapsule(
-                user_id=user_id,
-                name=name,
-                description=description
-            )
-            self.session.add(capsule)
-            self.session.commit()
+                # Create new capsule
+                capsule = MemoryCapsule(
+                    user_id=user_id,
+                    name=name,
+                    description=description
+                )
+                session.add(capsule)
+                session.commit()
             
-            return {
-                "success": True,
-                "capsule_id": capsule.id,
-                "message": f"Created new memory capsule: {name}"
-            }
+                return {
+                    "success": True,
+                    "capsule_id": capsule.id,
+                    "message": f"Created new memory capsule: {name}"
+                }
             
-        except Exception as e:
-            logger.error(f"Error creating memory capsule: {str(e)}")
-            self.session.rollback()
-            return {
-                "success": False,
-                "message": f"Error creating capsule: {str(e)}"
-            }
+            except Exception as e:
+                logger.error(f"Error creating memory capsule: {str(e)}")
+                session.rollback()
+                return {
+                    "success": False,
+                    "message": f"Error creating capsule: {str(e)}"
+                }
 
     async def add_entry(self, user_id: str, capsule_id: int, chat_log_id: int) -> Dict[str, Any]:
         """Add a journal entry to a memory capsule"""
-        try:
-            # Verify capsule belongs to user
-            capsule = (
-                self.session.query(MemoryCapsule)
-                .filter(
-                    MemoryCapsule.id == capsule_id,
-                    MemoryCapsule.user_id == user_id
+        with self.session_factory() as session:
+            try:
+                # Verify capsule belongs to user
+                capsule = (
+                    session.query(MemoryCapsule)
+                    .filter(
+                        MemoryCapsule.id == capsule_id,
+                        MemoryCapsule.user_id == user_id
+                    )
+                    .first()
                 )
-                .first()
-            )
             
-            if not capsule:
-                return {
-                    "success": False,
-                    "message": "Capsule not found or access denied."
-                }
+                if not capsule:
+                    return {
+                        "success": False,
+                        "message": "Capsule not found or access denied."
+                    }
             
-            # Verify chat log belongs to user
-            chat_log = (
-                self.session.query(ChatLog)
-                .filter(
-                    ChatLog.id == chat_log_id,
-                    ChatLog.user_id == user_id
+                # Verify chat log belongs to user
+                chat_log = (
+                    session.query(ChatLog)
+                    .filter(
+                        ChatLog.id == chat_log_id,
+                        ChatLog.user_id == user_id
+                    )
+                    .first()
                 )
-                .first()
-            )
             
-            if not chat_log:
-                return {
-                    "success": False,
-                    "message": "Journal entry not found or access denied."
-                }
+                if not chat_log:
+                    return {
+                        "success": False,
+                        "message": "Journal entry not found or access denied."
+                    }
             
-            # Check if entry is already in capsule
-            existing = (
-                self.session.query(CapsuleEntry)
-                .filter(
-                    CapsuleEntry.capsule_id == capsule_id,
-                    CapsuleEntry.chat_log_id == chat_log_id
+                # Check if entry is already in capsule
+                existing = (
+                    session.query(CapsuleEntry)
+                    .filter(
+                        CapsuleEntry.capsule_id == capsule_id,
+                        CapsuleEntry.chat_log_id == chat_log_id
+                    )
+                    .first()
                 )
-                .first()
-            )
             
-            if existing:
-                return {
-                    "success": False,
-                    "message": "This entry is already in the capsule."
-                }
+                if existing:
+                    return {
+                        "success": False,
+                        "message": "This entry is already in the capsule."
+                    }
             
-            # Add entry to capsule
-            capsule_entry = CapsuleEntry(
-                capsule_id=capsule_id,
-                chat_log_id=chat_log_id
-            )
-            self.session.add(capsule_entry)
-            self.session.commit()
+                # Add entry to capsule
+                capsule_entry = CapsuleEntry(
+                    capsule_id=capsule_id,
+                    chat_log_id=chat_log_id
+                )
+                session.add(capsule_entry)
+                session.commit()
             
-            return {
-                "success": True,
-                "message": "Entry added to capsule successfully."
-            }
+                return {
+                    "success": True,
+                    "message": "Entry added to capsule successfully."
+                }
             
-        except Exception as e:
-            logger.error(f"Error adding entry to capsule: {str(e)}")
-            self.session.rollback()
-            return {
-                "success": False,
-                "message": f"Error adding entry: {str(e)}"
-            }
+            except Exception as e:
+                logger.error(f"Error adding entry to capsule: {str(e)}")
+                session.rollback()
+                return {
+                    "success": False,
+                    "message": f"Error adding entry: {str(e)}"
+                }
 
     async def get_capsule_contents(self, user_id: str, capsule_id: int) -> Dict[str, Any]:
         """Get the contents and narrative summary of a memory capsule"""
         try:
-            # Get capsule with entries
-            capsule = (
-                self.session.query(MemoryCapsule)
-                .filter(
-                    MemoryCapsule.id == capsule_id,
-                    MemoryCapsule.user_id == user_id
+            with self.session_factory() as session:
+                # Get capsule with entries
+                capsule = (
+                    session.query(MemoryCapsule)
+                    .filter(
+                        MemoryCapsule.id == capsule_id,
+                        MemoryCapsule.user_id == user_id
+                    )
+                    .first()
                 )
-                .first()
-            )
             
-            if not capsule:
-                return {
-                    "success": False,
-                    "message": "Capsule not found or access denied."
-                }
+                if not capsule:
+                    return {
+                        "success": False,
+                        "message": "Capsule not found or access denied."
+                    }
             
-            # Get all entries in chronological order
-            entries = (
-                self.session.query(CapsuleEntry, ChatLog)
-                .join(ChatLog)
-                .filter(CapsuleEntry.capsule_id == capsule_id)
-                .order_by(ChatLog.timestamp.asc())
-                .all()
-            )
+                # Get all entries in chronological order
+                entries = (
+                    session.query(CapsuleEntry, ChatLog)
+                    .join(ChatLog)
+                    .filter(CapsuleEntry.capsule_id == capsule_id)
+                    .order_by(ChatLog.timestamp.asc())
+                    .all()
+                )
             
-            # Format entries for narrative generation
-            formatted_entries = []
-            for entry, chat_log in entries:
-                date_str = chat_log.timestamp.strftime("%Y-%m-%d")
-                formatted_entries.append(f"Date: {date_str}\nEntry: {chat_log.message_content}\n")
+                # Format entries for narrative generation
+                formatted_entries = []
+                for entry, chat_log in entries:
+                    date_str = chat_log.timestamp.strftime("%Y-%m-%d")
+                    formatted_entries.append(f"Date: {date_str}\nEntry: {chat_log.message_content}\n")
             
-            entries_text = "\n".join(formatted_entries)
+                entries_text = "\n".join(formatted_entries)
             
-            # Generate narrative using Mistral
+            # Generate narrative using Mistral (after the session is closed, so no
+            # pooled connection is held while waiting on the model)
             if entries:
                 narrative_response = await self.mistral_client.chat.complete_async(
                     model="mistral-large-latest",
@@ -211,15 +216,15 @@ Format the response with clear sections and thoughtful transitions."""
                 "capsule": {
                     "name": capsule.name,
                     "description": capsule.description,
-                    "created_at": capsule.created_at.isoformat(),
+                    "created_at": capsule.created_at,
                     "entry_count": len(entries)
                 },
                 "entries": [
                     {
                         "id": chat_log.id,
                         "content": chat_log.message_content,
-                        "timestamp": chat_log.timestamp.isoformat(),
-                        "added_at": entry.added_at.isoformat()
+                        "timestamp": chat_log.timestamp,
+                        "added_at": entry.added_at
                     }
                     for entry, chat_log in entries
                 ],
@@ -235,67 +240,69 @@ Format the response with clear sections and thoughtful transitions."""
 
     async def list_capsules(self, user_id: str) -> Dict[str, Any]:
         """List all memory capsules for a user"""
-        try:
-            capsules = (
-                self.session.query(MemoryCapsule)
-                .filter(MemoryCapsule.user_id == user_id)
-                .order_by(MemoryCapsule.created_at.desc())
-                .all()
-            )
+        with self.session_factory() as session:
+            try:
+                capsules = (
+                    session.query(MemoryCapsule)
+                    .filter(MemoryCapsule.user_id == user_id)
+                    .order_by(MemoryCapsule.created_at.desc())
+                    .all()
+                )
             
-            return {
-                "success": True,
-                "capsules": [
-                    {
-                        "id": capsule.id,
-                        "name": capsule.name,
-                        "description": capsule.description,
-                        "created_at": capsule.created_at.isoformat(),
-                        "entry_count": len(capsule.entries)
-                    }
-                    for capsule in capsules
-                ]
-            }
+                return {
+                    "success": True,
+                    "capsules": [
+                        {
+                            "id": capsule.id,
+                            "name": capsule.name,
+                            "description": capsule.description,
+                            "created_at": capsule.created_at,
+                            "entry_count": len(capsule.entries)
+                        }
+                        for capsule in capsules
+                    ]
+                }
             
-        except Exception as e:
-            logger.error(f"Error listing capsules: {str(e)}")
-            return {
-                "success": False,
-                "message": f"Error listing capsules: {str(e)}"
-            }
+            except Exception as e:
+                logger.error(f"Error listing capsules: {str(e)}")
+                return {
+                    "success": False,
+                    "message": f"Error listing capsules: {str(e)}"
+                }
 
     async def delete_capsule(self, user_id: str, capsule_id: int) -> Dict[str, Any]:
         """Delete a memory capsule and its entries"""
-        try:
-            # Verify capsule belongs to user
-            capsule = (
-                self.session.query(MemoryCapsule)
-                .filter(
-                    MemoryCapsule.id == capsule_id,
-                    MemoryCapsule.user_id == user_id
+        with self.session_factory() as session:
+            try:
+                # Verify capsule belongs to user
+                capsule = (
+                    session.query(MemoryCapsule)
+                    .filter(
+                        MemoryCapsule.id == capsule_id,
+                        MemoryCapsule.user_id == user_id
+                    )
+                    .first()
                 )
-                .first()
-            )
             
-            if not capsule:
-                return {
-                    "success": False,
-                    "message": "Capsule not found or access denied."
-                }
+                if not capsule:
+                    return {
+                        "success": False,
+                        "message": "Capsule not found or access denied."
+                    }
             
-            # Delete capsule (cascade will handle entries)
-            self.session.delete(capsule)
-            self.session.commit()
+                # Delete capsule (cascade will handle entries)
+                session.delete(capsule)
+                session.commit()
             
-            return {
-                "success": True,
-                "message": f"Deleted capsule: {capsule.name}"
-            }
+                return {
+                    "success": True,
+                    "message": f"Deleted capsule: {capsule.name}"
+                }
             
-        except Exception as e:
-            logger.error(f"Error deleting capsule: {str(e)}")
-            self.session.rollback()
-            return {
-                "success": False,
-                "message": f"Error deleting capsule: {str(e)}"
-            } 
\ No newline at end of file
+            except Exception as e:
+                logger.error(f"Error deleting capsule: {str(e)}")
+                session.rollback()
+                return {
+                    "success": False,
+                    "message": f"Error deleting capsule: {str(e)}"
+                } 
\ No newline at end of file
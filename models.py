@@ -1,12 +1,18 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, ForeignKey, Table
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, DateTime, Text, ForeignKey, Table, Index, case, func, inspect, text, update
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from datetime import datetime, UTC
 
 Base = declarative_base()
 
 class ChatLog(Base):
     __tablename__ = 'chat_logs'
+    __table_args__ = (
+        # Recent-message and per-user history queries filter/sort on these
+        Index('ix_chatlog_ts', 'timestamp'),
+        Index('ix_chatlog_user_ts', 'user_id', 'timestamp'),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(String(100), nullable=False)
@@ -16,7 +22,7 @@ class ChatLog(Base):
     timestamp = Column(DateTime, default=lambda: datetime.now(UTC))
     
     # Relationship with sentiment analysis
-    sentiment = relationship("MessageSentiment", back_populates="chat_log", uselist=False)
+    sentiment = relationship("MessageSentiment", back_populates="chat_log", uselist=False, cascade="all, delete-orphan")
 
     # Relationship with capsule entries
     capsule_entries = relationship("CapsuleEntry", backref="original_entry")
@@ -25,7 +31,7 @@ class MessageSentiment(Base):
     __tablename__ = 'message_sentiments'
     
     id = Column(Integer, primary_key=True)
-    chat_log_id = Column(Integer, ForeignKey('chat_logs.id'))
+    chat_log_id = Column(Integer, ForeignKey('chat_logs.id'), index=True)
     
     # Core emotions (based on Plutchik's wheel of emotions)
     joy = Column(Float)
@@ -44,12 +50,20 @@ class MessageSentiment(Base):
     # Overall sentiment score (-1 to 1)
     compound_score = Column(Float)
     
+    # Highest core emotion and its score, stored at write time so reads don't recompute them
+    dominant_emotion = Column(String(20))
+    dominant_score = Column(Float)
+    
     # Relationship with chat log
     chat_log = relationship("ChatLog", back_populates="sentiment")
 
 class FutureMessage(Base):
     """Store messages intended for future reading"""
     __tablename__ = 'future_messages'
+    __table_args__ = (
+        # Per-user listings are ordered by creation time
+        Index('ix_futuremessage_user_created', 'user_id', 'created_at'),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(String(100), nullable=False)
@@ -129,6 +143,10 @@ class UserAchievement(Base):
 class MemoryCapsule(Base):
     """Store themed memory capsules for users"""
     __tablename__ = 'memory_capsules'
+    __table_args__ = (
+        # Per-user listings are ordered by creation time
+        Index('ix_memorycapsule_user_created', 'user_id', 'created_at'),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(String(100), nullable=False)
@@ -145,7 +163,7 @@ class CapsuleEntry(Base):
     __tablename__ = 'capsule_entries'
     
     id = Column(Integer, primary_key=True)
-    capsule_id = Column(Integer, ForeignKey('memory_capsules.id', ondelete="CASCADE"), nullable=False)
+    capsule_id = Column(Integer, ForeignKey('memory_capsules.id', ondelete="CASCADE"), nullable=False, index=True)
     chat_log_id = Column(Integer, ForeignKey('chat_logs.id'), nullable=False)
     added_at = Column(DateTime, default=lambda: datetime.now(UTC))
     
@@ -153,6 +171,61 @@ class CapsuleEntry(Base):
     capsule = relationship("MemoryCapsule", back_populates="entries")
     chat_log = relationship("ChatLog")
 
+# SQLite allows one writer at a time, so a few pooled connections per engine are plenty;
+# more would only queue up on the write lock
+POOL_OPTIONS = dict(pool_size=5, max_overflow=0)
+
+# Wait this long for the write lock instead of failing with "database is locked"
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Configure each new connection: WAL lets readers run alongside the writer, busy_timeout waits for the lock"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
 # Create database engine and tables
-engine = create_engine('sqlite:///chat_logs.db')
-Base.metadata.create_all(engine) 
\ No newline at end of file
+# Connections are pooled so sessions don't pay for a fresh connect
+engine = create_engine('sqlite:///chat_logs.db', **POOL_OPTIONS)
+event.listen(engine, "connect", _set_sqlite_pragmas)
+Base.metadata.create_all(engine)
+
+# create_all skips tables that already exist, so add any indexes missing from older databases
+for table in Base.metadata.sorted_tables:
+    for index in table.indexes:
+        index.create(engine, checkfirst=True)
+
+def _backfill_dominant_emotions():
+    """Add the dominant emotion columns to older databases and fill them in for existing rows"""
+    table = MessageSentiment.__table__
+    with engine.begin() as connection:
+        existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+        for column in (table.c.dominant_emotion, table.c.dominant_score):
+            if column.name not in existing:
+                connection.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"
+                ))
+        
+        # SQLite's multi-argument max() picks the highest score; the first column reaching it names it
+        emotion_columns = [table.c[emotion] for emotion in ("joy", "trust", "fear", "surprise", "sadness", "disgust", "anger", "anticipation")]
+        dominant_score = func.max(*emotion_columns)
+        connection.execute(
+            update(table)
+            .where(table.c.dominant_emotion.is_(None), table.c.joy.is_not(None))
+            .values(
+                dominant_score=dominant_score,
+                dominant_emotion=case(*((column == dominant_score, column.name) for column in emotion_columns))
+            )
+        )
+
+_backfill_dominant_emotions()
+
+# Shared session factory; objects stay usable after commit without being reloaded
+Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+# Async engine and session factory for code running on the event loop (aiosqlite driver),
+# so database I/O there never blocks the loop
+async_engine = create_async_engine('sqlite+aiosqlite:///chat_logs.db', **POOL_OPTIONS)
+event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
@@ -0,0 +1,209 @@
+import functools
+import json
+import logging
+import os
+import threading
+from typing import Optional
+import numpy as np
+from models import engine
+
+logger = logging.getLogger("discord")
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SIMILARITY_THRESHOLD = 0.85
+
+# Recent embeddings are kept so a miss's lookup and store share one forward pass
+EMBEDDING_MEMO_SIZE = 64
+
+class SemanticResponseCache:
+    """
+    Reuse stored agent responses for prompts that are (nearly) identical to earlier ones
+
+    Entries are scoped to the user who wrote the prompt, so a reply never reaches anyone else.
+    The model runs synchronously; call lookup/store/save from a worker thread (asyncio.to_thread)
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, max_entries: int = 5000, save_every: int = 20):
+        """
+        Initialize the cache and load any previously persisted entries
+
+        Args:
+            threshold: Minimum cosine similarity for a semantic hit
+            max_entries: Maximum number of semantic entries kept (oldest are overwritten first)
+            save_every: Persist the cache to disk after this many new entries
+        """
+        # transformers is imported here rather than at module level, so importing this module
+        # (and the bot) doesn't pull in torch until the cache is actually built
+        from transformers import pipeline
+
+        # Embedding model is loaded once and shared by every lookup
+        self.embedding_pipeline = pipeline("feature-extraction", model=EMBEDDING_MODEL)
+        self._embed = functools.lru_cache(maxsize=EMBEDDING_MEMO_SIZE)(self._embed_text)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.save_every = save_every
+        self._unsaved = 0
+        self.hits = 0
+        self.misses = 0
+
+        # Lookups and stores come from several worker threads
+        self._lock = threading.Lock()
+
+        # Tier 1: exact matches on "<user_id>:<normalized text>" (e.g. "hi", "thanks")
+        self.exact = {}
+
+        # Tier 2: ring buffer of normalized embeddings with their owners and responses, row-aligned;
+        # the embedding rows are allocated on the first store, once the model's width is known
+        self.embeddings = None
+        self.owners = np.zeros(max_entries, dtype=np.int64)
+        self.responses = [None] * max_entries
+        self._count = 0
+        self._next = 0
+
+        # Sidecar files live next to the SQLite database
+        stem = os.path.splitext(engine.url.database or "chat_logs.db")[0]
+        self.embeddings_path = f"{stem}_response_cache.npy"
+        self.responses_path = f"{stem}_response_cache.json"
+        self._load()
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Normalize text for exact-match lookups"""
+        return " ".join(text.lower().split())
+
+    @staticmethod
+    def _exact_key(user_id: int, key: str) -> str:
+        """Scope a normalized prompt to its user (a string, so the tier can be saved as JSON)"""
+        return f"{user_id}:{key}"
+
+    def _embed_text(self, text: str) -> np.ndarray:
+        """Compute a unit-length sentence embedding (mean pooling over tokens)"""
+        token_embeddings = np.asarray(self.embedding_pipeline(text)[0], dtype=np.float32)
+        embedding = token_embeddings.mean(axis=0)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else embedding
+
+    def lookup(self, user_id: int, text: str) -> Optional[str]:
+        """
+        Find a cached response to one of this user's earlier prompts
+
+        Args:
+            user_id: The Discord ID of the prompt's author
+            text: The user's message content
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        key = self._normalize(text)
+        if not key:
+            return None
+
+        with self._lock:
+            response = self.exact.get(self._exact_key(user_id, key))
+            has_own_entries = bool(np.any(self.owners[:self._count] == user_id))
+        if response is not None:
+            self.hits += 1
+            return response
+
+        if has_own_entries:
+            embedding = self._embed(text)
+            with self._lock:
+                rows = np.flatnonzero(self.owners[:self._count] == user_id)
+                # Embeddings are unit length, so the dot product is the cosine similarity
+                similarities = self.embeddings[rows] @ embedding
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    logger.debug("Semantic cache hit (similarity %.3f)", similarities[best])
+                    self.hits += 1
+                    return self.responses[rows[best]]
+
+        self.misses += 1
+        return None
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the number of cached responses"""
+        return {"hits": self.hits, "misses": self.misses, "size": self._count}
+
+    def store(self, user_id: int, text: str, response: str):
+        """
+        Add a prompt/response pair to the cache
+
+        Args:
+            user_id: The Discord ID of the prompt's author
+            text: The user's message content
+            response: The agent's response to it
+        """
+        key = self._normalize(text)
+        if not key or not response:
+            return
+
+        embedding = self._embed(text)
+        with self._lock:
+            self.exact[self._exact_key(user_id, key)] = response
+
+            # Overwrite the oldest row in place instead of regrowing the matrix
+            if self.embeddings is None:
+                self.embeddings = np.zeros((self.max_entries, embedding.shape[0]), dtype=np.float32)
+            row = self._next
+            self.embeddings[row] = embedding
+            self.owners[row] = user_id
+            self.responses[row] = response
+            self._next = (row + 1) % self.max_entries
+            self._count = min(self._count + 1, self.max_entries)
+
+            # Keep the exact-match tier bounded as well (dicts preserve insertion order)
+            while len(self.exact) > self.max_entries:
+                self.exact.pop(next(iter(self.exact)))
+
+            self._unsaved += 1
+            should_save = self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+    def save(self):
+        """Persist the cache to its sidecar files, oldest entry first"""
+        try:
+            with self._lock:
+                # Unroll the ring so the files are in insertion order
+                order = np.roll(np.arange(self._count), -self._next if self._count == self.max_entries else 0)
+                embeddings = self.embeddings[order] if self.embeddings is not None else np.empty((0, 0), dtype=np.float32)
+                data = {
+                    "owners": self.owners[order].tolist(),
+                    "responses": [self.responses[i] for i in order],
+                    "exact": dict(self.exact)
+                }
+                self._unsaved = 0
+            np.save(self.embeddings_path, embeddings)
+            with open(self.responses_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+        except Exception as e:
+            logger.error("Error saving response cache: %s", e)
+
+    def _load(self):
+        """Load a previously persisted cache, if one exists"""
+        if not (os.path.exists(self.embeddings_path) and os.path.exists(self.responses_path)):
+            return
+
+        try:
+            embeddings = np.load(self.embeddings_path)
+            with open(self.responses_path, encoding="utf-8") as f:
+                data = json.load(f)
+
+            # Files written before entries were scoped to users can't be attributed; start over
+            if "owners" not in data:
+                raise ValueError("Cache predates per-user entries")
+            if not (len(data["responses"]) == len(data["owners"]) == len(embeddings)):
+                raise ValueError("Embedding, owner and response counts do not match")
+
+            # Keep the newest entries if the cache has since been made smaller
+            count = min(len(embeddings), self.max_entries)
+            if count:
+                self.embeddings = np.zeros((self.max_entries, embeddings.shape[1]), dtype=np.float32)
+                self.embeddings[:count] = embeddings[-count:]
+                self.owners[:count] = data["owners"][-count:]
+                self.responses[:count] = data["responses"][-count:]
+            self._count = count
+            self._next = count % self.max_entries
+            self.exact = data["exact"]
+        except Exception as e:
+            logger.error("Error loading response cache: %s", e)
@@ -0,0 +1,41 @@
+import os
+from dataclasses import dataclass
+from functools import cache
+from typing import FrozenSet, Optional
+from dotenv import load_dotenv
+
+# Admins used when AUTHORIZED_USER_IDS isn't set (replace with your Discord user ID)
+DEFAULT_AUTHORIZED_USER_IDS = "1341570352840445983"
+
+@dataclass(frozen=True)
+class Settings:
+    """Configuration read from the environment (and .env) once at startup"""
+    discord_token: Optional[str]
+    mistral_api_key: Optional[str]
+    authorized_user_ids: FrozenSet[int]  # Discord user IDs allowed to run admin commands
+    db_batch: int  # Chat logs written per INSERT
+    llm_max_inflight: int  # Concurrent LLM calls
+    sentiment_onnx_dir: Optional[str]  # Quantized ONNX export of the sentiment model, if any
+    sentiment_onnx_file: str
+
+@cache
+def settings() -> Settings:
+    """
+    Load the settings on first use and return the same object afterwards
+
+    Modules read their configuration from here rather than os.getenv, so the .env file
+    is loaded before any of them looks at a value regardless of import order
+    """
+    load_dotenv()
+    return Settings(
+        discord_token=os.getenv("DISCORD_TOKEN"),
+        mistral_api_key=os.getenv("MISTRAL_API_KEY"),
+        authorized_user_ids=frozenset(
+            int(user_id) for user_id in os.getenv("AUTHORIZED_USER_IDS", DEFAULT_AUTHORIZED_USER_IDS).split(",")
+            if user_id.strip()
+        ),
+        db_batch=int(os.getenv("DB_BATCH", "64")),
+        llm_max_inflight=int(os.getenv("LLM_MAX_INFLIGHT", "8")),
+        sentiment_onnx_dir=os.getenv("SENTIMENT_ONNX_DIR"),
+        sentiment_onnx_file=os.getenv("SENTIMENT_ONNX_FILE", "model_quantized.onnx")
+    )